@@ -1,3 +1,5 @@
+import threading
+
 from flasgger import Swagger
 from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
@@ -9,9 +11,15 @@ from flask_sqlalchemy import SQLAlchemy
 
 from .api import __all__ as api_blueprints
 from .client import __all__ as client_blueprints
+from .commands import register_commands
 from .config import Config
-from .extensions import db
+from .extensions import catalog_cache, db
 from .models import *
+from .utils.autocomplete import product_autocomplete
+from .utils.outbox import outbox_worker
+from .utils.passwords import password_hasher
+from .utils.reservations import reservation_sweeper
+from .utils.revenue import revenue_folder, revenue_rollups
 
 
 def create_app():
@@ -45,6 +53,32 @@ def create_app():
 
     # Initialize database
     db.init_app(app)
+    catalog_cache.init_app(app)
+    product_autocomplete.init_app(app)
+    password_hasher.init_app(app)
+    reservation_sweeper.init_app(app)
+    outbox_worker.init_app(app)
+    revenue_rollups.init_app(app)
+    revenue_folder.init_app(app)
+
+    # Background threads belong to processes that serve requests: they start
+    # with the first request, so seed_db.py and `flask` commands never spawn
+    # them. BACKGROUND_WORKERS=false leaves them to a dedicated process.
+    if app.config["BACKGROUND_WORKERS"] and not app.testing:
+        started = threading.Event()
+        start_lock = threading.Lock()
+
+        @app.before_request
+        def start_background_workers():
+            if started.is_set():
+                return
+            with start_lock:
+                if not started.is_set():
+                    reservation_sweeper.start(app)
+                    outbox_worker.start(app)
+                    product_autocomplete.start(app)
+                    revenue_folder.start(app)
+                    started.set()
 
     # Register API blueprints
     for bp in api_blueprints:
@@ -54,6 +88,9 @@ def create_app():
     for bp in client_blueprints:
         app.register_blueprint(bp, url_prefix="/")
 
+    # Register CLI maintenance commands
+    register_commands(app)
+
     @app.route("/")
     def index():
         return {
@@ -3,6 +3,7 @@ from flask import Blueprint, jsonify, request
 from app.extensions import db
 from app.models.address import Address
 from app.utils.api_helpers import APIResponse
+from app.utils.query_params import QueryParamError, bool_arg
 
 address_bp = Blueprint("addresses", __name__)
 
@@ -10,11 +11,18 @@ address_bp = Blueprint("addresses", __name__)
 def get_addresses():
     try:
         query = Address.query
+        if bool_arg("stream"):
+            return APIResponse.stream(
+                query.order_by(Address.id), message="Address retrieved successfully"
+            )
+
         addresses = [address.serialize() for address in query.all()]
 
         return APIResponse.success(
             data=addresses, message="Address retrieved successfully", status_code=200
         )
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
     except Exception as e:
         return APIResponse.error(message=f"Failed to get addresses: {e}", status_code=400, error_code=500)
 
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+from flask import Blueprint, current_app, request
+
+from app.utils.api_helpers import APIResponse
+from app.utils.query_params import QueryParamError, datetime_arg
+from app.utils.revenue import GRANULARITIES, revenue_series
+
+analytics_bp = Blueprint("analytics", __name__)
+
+
+@analytics_bp.route("/analytics/revenue", methods=["GET"])
+# @admin_required
+def get_revenue():
+    """
+    Revenue time series
+    ---
+    tags:
+      - Analytics
+    summary: Orders, gross revenue, refunds, net revenue and AOV per day or hour
+    description: >
+      Read from the revenue_daily / revenue_hourly rollups plus the
+      revenue_deltas not folded into them yet, so the cost depends on the
+      number of buckets rather than the number of orders. Orders count at
+      their order_date and refunds at their payment_date; cancelled orders
+      are not counted. AOV is gross revenue divided by order count for the
+      bucket.
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: from
+        type: string
+        description: Inclusive ISO 8601 start (default 30 days before `to`)
+      - in: query
+        name: to
+        type: string
+        description: Exclusive ISO 8601 end (default now)
+      - in: query
+        name: granularity
+        type: string
+        enum: [day, hour]
+        default: day
+    responses:
+      200:
+        description: One entry per non-empty bucket; meta.totals covers the whole range
+      400:
+        description: Invalid dates, range or granularity
+    """
+    try:
+        granularity = request.args.get("granularity", "day")
+        if granularity not in GRANULARITIES:
+            return APIResponse.error(
+                message=f"granularity must be one of: {', '.join(GRANULARITIES)}", status_code=400
+            )
+        date_to = datetime_arg("to", datetime.utcnow())
+        date_from = datetime_arg("from", date_to - timedelta(days=30))
+        if date_from >= date_to:
+            return APIResponse.error(message="from must be before to", status_code=400)
+        max_days = current_app.config["REVENUE_HOURLY_MAX_DAYS"]
+        if granularity == "hour" and date_to - date_from > timedelta(days=max_days):
+            return APIResponse.error(
+                message=f"Hourly ranges are limited to {max_days} days", status_code=400
+            )
+
+        series, totals = revenue_series(date_from, date_to, granularity)
+
+        return APIResponse.success(
+            data=series,
+            message="Revenue retrieved successfully",
+            status_code=200,
+            meta={
+                "from": date_from.isoformat(),
+                "to": date_to.isoformat(),
+                "granularity": granularity,
+                "totals": totals,
+            },
+        )
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to get revenue: {e}", status_code=400, error_code=500)
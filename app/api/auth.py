@@ -1,6 +1,5 @@
 import datetime
 
-import bcrypt
 import jwt
 from flasgger import swag_from
 from flask import Blueprint, current_app, request
@@ -8,10 +7,18 @@ from flask import Blueprint, current_app, request
 from app.extensions import db
 from app.models.user import User, UserRole
 from app.utils.api_helpers import APIResponse
+from app.utils.passwords import HasherBusy, password_hasher
 
 auth_bp = Blueprint("auth", __name__)
 
 
+def _busy(e):
+    """503 with Retry-After when the hashing pool sheds the request"""
+    response, status_code = APIResponse.error(str(e), 503)
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, status_code
+
+
 @auth_bp.route("/auth/register", methods=["POST"])
 def register():
     """
@@ -47,6 +54,8 @@ def register():
         description: User registered successfully
       409:
         description: User already exists
+      503:
+        description: Password hashing is saturated; retry after Retry-After seconds
       500:
         description: Registration failed
     """
@@ -57,10 +66,7 @@ def register():
         if exsisting_user:
             return APIResponse.error("User with this email already exists", 409)
 
-        hashed_password = bcrypt.hashpw(
-            data["password"].encode("utf-8"),
-            bcrypt.gensalt()
-        ).decode("utf-8")
+        hashed_password = password_hasher.hash(data["password"])
 
         user = User(
             first_name=data["first_name"],
@@ -91,6 +97,8 @@ def register():
             201
         )
 
+    except HasherBusy as e:
+        return _busy(e)
     except Exception as e:
         db.session.rollback()
         return APIResponse.error(f"Registration failed: {str(e)}", 500)
@@ -122,6 +130,8 @@ def login():
         description: Login successful
       401:
         description: Invalid credentials
+      503:
+        description: Password hashing is saturated; retry after Retry-After seconds
       500:
         description: Login failed
     """
@@ -133,10 +143,15 @@ def login():
         if not user:
             return APIResponse.error("Invalid email or password.", 401)
 
-        # Convert stored password hash back to bytes for bcrypt comparison
-        if not bcrypt.checkpw(data["password"].encode("utf-8"), user.password_hash.encode("utf-8")):
+        if not password_hasher.verify(data["password"], user.password_hash):
             return APIResponse.error("Invalid email or password", 401)
 
+        # Move the stored hash to the current BCRYPT_ROUNDS while we have the password
+        upgraded = password_hasher.upgrade(data["password"], user.password_hash)
+        if upgraded is not None:
+            user.password_hash = upgraded
+            db.session.commit()
+
         # json web token
         token = jwt.encode(
             {
@@ -154,5 +169,7 @@ def login():
             },
             "Login successful"
         )
+    except HasherBusy as e:
+        return _busy(e)
     except Exception as e:
         return APIResponse.error(f"Login failed: {str(e)}", 500)
@@ -1,12 +1,68 @@
 from flasgger import swag_from
 from flask import Blueprint, jsonify, request
+from sqlalchemy import case, func
 
-from app.extensions import db
+from app.extensions import catalog_cache, db
 from app.models.category import Category
+from app.models.product import Product
 from app.utils.api_helpers import APIResponse
+from app.utils.category_tree import build_category_tree
+from app.utils.conditional import conditional, make_etag
+from app.utils.fieldsets import load_only_fields, parse_fields, serializer_for
+from app.utils.pagination import get_page_size, keyset_page
+from app.utils.product_listing import PRODUCT_HIDDEN_FIELDS, PRODUCT_SORTS, in_stock_filters
+from app.utils.query_params import QueryParamError, bool_arg
 
 category_bp = Blueprint("categories", __name__)
 
+catalog_cache.watch(
+    Category, lambda category: [("category", category.id), ("category_tree",)]
+)
+
+
+def _load_category_stats(missing):
+    """
+    Product aggregates for the categories in `missing` with one GROUP BY.
+
+    Keys are ("category_stats", category_id); entries are invalidated by the
+    product cache watcher whenever a product of that category is committed.
+    """
+    category_ids = [key[1] for key in missing]
+    stats = {
+        key: {"product_count": 0, "in_stock_count": 0, "min_price": None, "max_price": None}
+        for key in missing
+    }
+    rows = (
+        db.session.query(
+            Product.category_id,
+            func.count(Product.id),
+            func.sum(case((Product.stock_quantity > 0, 1), else_=0)),
+            func.min(Product.price),
+            func.max(Product.price),
+        )
+        .filter(Product.category_id.in_(category_ids))
+        .group_by(Product.category_id)
+    )
+    for category_id, product_count, in_stock_count, min_price, max_price in rows:
+        stats[("category_stats", category_id)] = {
+            "product_count": product_count,
+            "in_stock_count": int(in_stock_count or 0),
+            "min_price": min_price,
+            "max_price": max_price,
+        }
+    return stats
+
+
+def _with_stats(categories):
+    """Serialize categories and merge in their cached product aggregates"""
+    keys = [("category_stats", category.id) for category in categories]
+    stats = catalog_cache.get_many_or_load(keys, _load_category_stats)
+    return [
+        {**category.serialize(), **stats[("category_stats", category.id)]}
+        for category in categories
+    ]
+
+
 @category_bp.route("/categories", methods=["GET"])
 def get_categories():
     """
@@ -18,6 +74,17 @@ def get_categories():
     description: Get a list of all product categories
     produces:
       - application/json
+    parameters:
+      - in: query
+        name: stats
+        type: boolean
+        required: false
+        description: Add product_count, in_stock_count, min_price and max_price to every category
+      - in: query
+        name: stream
+        type: boolean
+        required: false
+        description: Stream the list incrementally instead of building it in memory
     responses:
       200:
         description: Categories retrieved successfully
@@ -65,15 +132,81 @@ def get_categories():
               example: "Failed to get categories: Error message"
     """
     try:
-        query = Category.query
-        categories = [category.serialize() for category in query.all()]
+        last_modified, total = db.session.query(
+            func.max(Category.updated_at), func.count(Category.id)
+        ).one()
 
-        return APIResponse.success(
-            data=categories, message="Categories retrieved successfully", status_code=200
+        stream = bool_arg("stream")
+        stats = bool_arg("stats")
+        products_version = None
+        if stats:
+            products_version = db.session.query(
+                func.max(Product.updated_at), func.count(Product.id)
+            ).one()
+            if products_version[0] and (not last_modified or products_version[0] > last_modified):
+                last_modified = products_version[0]
+
+        def build():
+            query = Category.query
+            if stream and stats:
+                # Stats for a whole batch in one GROUP BY, queried between batches
+                return APIResponse.stream_batches(
+                    query,
+                    Category.id,
+                    _with_stats,
+                    message="Categories retrieved successfully",
+                )
+            if stream:
+                return APIResponse.stream(
+                    query.order_by(Category.id), message="Categories retrieved successfully"
+                )
+
+            categories = query.all()
+            if stats:
+                categories = _with_stats(categories)
+            else:
+                categories = [category.serialize() for category in categories]
+
+            return APIResponse.success(
+                data=categories, message="Categories retrieved successfully", status_code=200
+            )
+
+        return conditional(
+            make_etag("categories", last_modified, total, stream, stats, products_version),
+            last_modified,
+            build,
         )
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
     except Exception as e:
         return APIResponse.error(message=f"Failed to get categories: {e}", status_code=400, error_code=500)
 
+@category_bp.route("/categories/tree", methods=["GET"])
+def get_category_tree():
+    """
+    Get the category hierarchy
+    ---
+    tags:
+      - Categories
+    summary: Retrieve the full category tree
+    description: Nested categories built from one ordered query. The result is cached and rebuilt after a category is committed (or when the cache TTL expires).
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Category tree retrieved successfully
+      500:
+        description: Failed to get category tree
+    """
+    try:
+        tree = catalog_cache.get_or_load(("category_tree",), build_category_tree)
+
+        return APIResponse.success(
+            data=tree or [], message="Category tree retrieved successfully", status_code=200
+        )
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to get category tree: {e}", status_code=400, error_code=500)
+
 @category_bp.route("/categories/<int:category_id>", methods=["GET"])
 def get_category(category_id: int):
     """
@@ -140,18 +273,134 @@ def get_category(category_id: int):
               example: "Failed to retrieve category: Error message"
     """
     try:
-        category = Category.query.get(category_id)
-        if not category:
+        def load():
+            category = Category.query.get(category_id)
+            return category.serialize() if category else None
+
+        category_data = catalog_cache.get_or_load(("category", category_id), load)
+        if not category_data:
+            return APIResponse.error(message="Category not found", status_code=400, error_code=404)
+
+        return conditional(
+            make_etag("category", category_id, category_data["updated_at"]),
+            category_data["updated_at"],
+            lambda: APIResponse.success(
+                data=category_data,
+                message="Category retrieved successfully",
+                status_code=200
+            ),
+        )
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to retrieve category: {e}", status_code=400, error_code=404)
+
+@category_bp.route("/categories/<int:category_id>/products", methods=["GET"])
+def get_category_products(category_id: int):
+    """
+    Get the products of a category
+    ---
+    tags:
+      - Categories
+    summary: Browse a category page by page
+    description: Keyset-paginated products of one category, read through the (category_id, sort column, id) indexes instead of loading the Category.products relationship.
+    produces:
+      - application/json
+    parameters:
+      - in: path
+        name: category_id
+        type: integer
+        required: true
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        description: Page size (capped at PAGE_SIZE_MAX)
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: Opaque cursor taken from meta.next_cursor of the previous page
+      - in: query
+        name: sort
+        type: string
+        required: false
+        enum: [created_at, -created_at, price, -price]
+        default: created_at
+      - in: query
+        name: in_stock
+        type: boolean
+        required: false
+        description: true for stock_quantity > 0, false for sold-out products
+      - in: query
+        name: descendants
+        type: boolean
+        required: false
+        description: Include products of every sub-category (one range scan on the category path)
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: Comma-separated product columns to return
+    responses:
+      200:
+        description: Products retrieved successfully, with meta.next_cursor
+      400:
+        description: Invalid limit, sort, cursor or filter
+      404:
+        description: Category not found
+      500:
+        description: Failed to get category products
+    """
+    try:
+        sort = request.args.get("sort", "created_at")
+        if sort not in PRODUCT_SORTS:
+            return APIResponse.error(message=f"Unsupported sort: {sort}", status_code=400)
+        sort_column, descending = PRODUCT_SORTS[sort]
+        limit = get_page_size()
+        stock_filters = in_stock_filters()
+        descendants = bool_arg("descendants")
+        fields = parse_fields(Product, hidden=PRODUCT_HIDDEN_FIELDS)
+        serializer = serializer_for(fields)
+
+        def load():
+            category = Category.query.get(category_id)
+            return category.serialize() if category else None
+
+        category_data = catalog_cache.get_or_load(("category", category_id), load)
+        if not category_data:
             return APIResponse.error(message="Category not found", status_code=400, error_code=404)
-        category_data = category.serialize()
+
+        if descendants and category_data["path"]:
+            lower, upper = Category.subtree_bounds(category_data["path"])
+            subtree = db.session.query(Category.id).filter(
+                Category.path >= lower, Category.path < upper
+            )
+            query = Product.query.filter(Product.category_id.in_(subtree.scalar_subquery()))
+        else:
+            query = Product.query.filter(Product.category_id == category_id)
+        query = query.filter(*stock_filters)
+        if fields is not None:
+            query = load_only_fields(query, Product, fields, sort_column)
+
+        rows, next_cursor = keyset_page(
+            query,
+            sort_key=sort,
+            sort_column=sort_column,
+            id_column=Product.id,
+            limit=limit,
+            cursor=request.args.get("cursor"),
+            descending=descending,
+        )
 
         return APIResponse.success(
-            data=category_data,
-            message="Category retrieved successfully",
-            status_code=200
+            data=[serializer(product) for product in rows],
+            message="Products retrieved successfully",
+            status_code=200,
+            meta={"limit": limit, "next_cursor": next_cursor},
         )
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
     except Exception as e:
-        return APIResponse.error(message=f"Failed to retrieve category: {e}", status_code=400, error_code=404)
+        return APIResponse.error(message=f"Failed to get category products: {e}", status_code=400, error_code=500)
 
 @category_bp.route("/categories", methods=["POST"])
 def create_category():
@@ -185,6 +434,10 @@ def create_category():
               type: string
               example: "Electronic devices and gadgets"
               description: Category description
+            parent_id:
+              type: integer
+              example: 1
+              description: Parent category ID (optional, omit for a top-level category)
     responses:
       201:
         description: Category created successfully
@@ -224,9 +477,25 @@ def create_category():
     try:
         data = request.get_json()
 
-        new_category = Category(name=data["name"], description=data["description"])
+        parent_path = None
+        parent_id = data.get("parent_id")
+        if parent_id is not None:
+            parent = Category.query.get(parent_id)
+            if not parent:
+                return APIResponse.error(message="Parent category not found", status_code=400)
+            if not parent.path:
+                return APIResponse.error(
+                    message="Parent category has no path, run rebuild-category-paths", status_code=400
+                )
+            parent_path = parent.path
+
+        new_category = Category(
+            name=data["name"], description=data["description"], parent_id=parent_id
+        )
 
         db.session.add(new_category)
+        db.session.flush()
+        new_category.assign_path(parent_path)
         db.session.commit()
         return APIResponse.success(
             data=new_category.serialize(),
@@ -234,6 +503,7 @@ def create_category():
             status_code=201
         )
     except Exception as e:
+        db.session.rollback()
         return APIResponse.error(
             message=f"Failed to create category: {e}",
             status_code=400,
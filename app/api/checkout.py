@@ -0,0 +1,87 @@
+from flask import Blueprint, current_app, request
+
+from app.utils.api_helpers import APIResponse
+from app.utils.checkout import CheckoutError, checkout
+from app.utils.idempotency import idempotent
+
+checkout_bp = Blueprint("checkout", __name__)
+
+
+@checkout_bp.route("/checkout", methods=["POST"])
+@idempotent
+def create_checkout():
+    """
+    Place an order in one call
+    ---
+    tags:
+      - Checkout
+    summary: Create an order with its items and take stock atomically
+    description: >
+      Creates the Order and all OrderItem rows, prices them from the current
+      catalog and decrements stock in a single transaction. Stock is taken with
+      a conditional UPDATE, so concurrent checkouts can never oversell. Holds
+      that have lapsed are released first; reservation_ids are the buyer's
+      own active holds, whose units are sold from the reservation.
+    consumes:
+      - application/json
+    produces:
+      - application/json
+    parameters:
+      - in: body
+        name: checkout_data
+        required: true
+        schema:
+          type: object
+          required: [user_id, shipping_address_id, items]
+          properties:
+            user_id:
+              type: integer
+              example: 2
+            shipping_address_id:
+              type: integer
+              example: 1
+            shipping_method:
+              type: string
+              example: "Standard Shipping"
+            reservation_ids:
+              type: array
+              items:
+                type: integer
+              example: [12]
+            items:
+              type: array
+              items:
+                type: object
+                required: [product_id, quantity]
+                properties:
+                  product_id:
+                    type: integer
+                    example: 1
+                  quantity:
+                    type: integer
+                    example: 2
+    responses:
+      201:
+        description: Order placed; data holds the order and its items
+      400:
+        description: Invalid cart, unknown products or address
+      409:
+        description: >
+          Insufficient stock (details.shortages lists the lines), or a
+          reservation is no longer active (details.reservation_ids)
+      500:
+        description: Checkout failed
+    """
+    try:
+        data = request.get_json() or {}
+        order, items = checkout(data, retries=current_app.config["CHECKOUT_RETRIES"])
+
+        return APIResponse.success(
+            data={**order.serialize(), "items": [item.serialize() for item in items]},
+            message="Order placed successfully",
+            status_code=201,
+        )
+    except CheckoutError as e:
+        return APIResponse.error(message=e.message, status_code=e.status_code, details=e.details)
+    except Exception as e:
+        return APIResponse.error(message=f"Checkout failed: {e}", status_code=400, error_code=500)
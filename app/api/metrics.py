@@ -0,0 +1,41 @@
+from flask import Blueprint
+
+from app.extensions import catalog_cache
+from app.utils.api_helpers import APIResponse
+from app.utils.autocomplete import product_autocomplete
+from app.utils.outbox import outbox_worker
+from app.utils.passwords import password_hasher
+from app.utils.reservations import reservation_sweeper
+from app.utils.revenue import revenue_folder
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+# @admin_required
+def get_metrics():
+    """
+    Runtime metrics for this worker process
+    ---
+    tags:
+      - Metrics
+    summary: In-process cache, index, worker and password-hashing counters
+    description: Counters are per worker process and reset on restart
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Metrics retrieved successfully
+    """
+    return APIResponse.success(
+        data={
+            "catalog_cache": catalog_cache.stats(),
+            "autocomplete": product_autocomplete.stats(),
+            "reservation_sweeper": reservation_sweeper.stats(),
+            "outbox_worker": outbox_worker.stats(),
+            "revenue_folder": revenue_folder.stats(),
+            "password_hasher": password_hasher.stats(),
+        },
+        message="Metrics retrieved successfully",
+        status_code=200,
+    )
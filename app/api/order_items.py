@@ -3,6 +3,9 @@ from flask import Blueprint, jsonify, request
 from app.extensions import db
 from app.models.order_item import OrderItem
 from app.utils.api_helpers import APIResponse
+from app.utils.idempotency import idempotent
+from app.utils.query_params import QueryParamError, bool_arg
+from app.utils.sales import record_sale
 
 orderitem_bp = Blueprint("order_items", __name__)
 
@@ -10,12 +13,19 @@ orderitem_bp = Blueprint("order_items", __name__)
 def get_order_items():
     try:
         query = OrderItem.query
+        if bool_arg("stream"):
+            return APIResponse.stream(
+                query.order_by(OrderItem.id), message="OrderItems retrieved successfully"
+            )
+
         order_items = [order_item.serialize() for order_item in query.all()]
 
         return APIResponse.success(
             data=order_items, message="OrderItems retrieved successfully", status_code=200
         )
     
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
     except Exception as e:
         return APIResponse.error(message=f"Failed to get OrderItem: {e}", status_code=400, error_code=500)
 
@@ -38,6 +48,7 @@ def get_order_item(order_item_id: int):
         return APIResponse.error(message=f"Failed to retrieve Order_item: {e}", status_code=400, error_code=404)
 
 @orderitem_bp.route("/order_items", methods=["POST"])
+@idempotent
 def create_order_item():
     try:
         data = request.get_json()
@@ -50,6 +61,16 @@ def create_order_item():
         )
 
         db.session.add(new_order_item)
+        db.session.flush()
+
+        # Keep the best-seller rollup in the same transaction as the line
+        record_sale(
+            product_id=new_order_item.product_id,
+            category_id=new_order_item.product.category_id,
+            sold_at=new_order_item.order.order_date,
+            quantity=new_order_item.quantity,
+            price_per_unit=new_order_item.price_per_unit,
+        )
         db.session.commit()
 
         return APIResponse.success(
@@ -58,6 +79,7 @@ def create_order_item():
             status_code=201
         )
     except Exception as e:
+        db.session.rollback()
         return APIResponse.error(
             message=f"Failed to create order item: {e}",
             status_code=400,
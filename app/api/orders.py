@@ -1,20 +1,114 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.extensions import db
-from app.models.order import Order
+from app.models.order import Order, OrderStatus
+from app.models.order_item import OrderItem
+from app.models.user import User
 from app.utils.api_helpers import APIResponse
+from app.utils.checkout import CheckoutError
+from app.utils.fieldsets import load_only_fields, parse_fields, parse_includes, serializer_for
+from app.utils.idempotency import idempotent
+from app.utils.order_items import add_order_items
+from app.utils.order_transitions import transition_orders
+from app.utils.pagination import get_page_size, keyset_page
+from app.utils.query_params import QueryParamError, bool_arg, datetime_arg
 
 order_bp = Blueprint("orders", __name__)
 
+ORDER_INCLUDES = ("items", "items.product", "payments", "shipping_address")
+
+# ?sort= values for the order history: (column, descending)
+ORDER_HISTORY_SORTS = {
+    "-order_date": (Order.order_date, True),
+    "order_date": (Order.order_date, False),
+}
+
+
+def _include_options(includes):
+    """
+    Eager-load the requested relationships so an order page costs one query
+    per relationship instead of one per row: collections use selectinload
+    (a single IN query per level), many-to-one uses a JOIN.
+    """
+    options = []
+    if "items.product" in includes:
+        options.append(selectinload(Order.order_items).joinedload(OrderItem.product))
+    elif "items" in includes:
+        options.append(selectinload(Order.order_items))
+    if "payments" in includes:
+        options.append(selectinload(Order.payments))
+    if "shipping_address" in includes:
+        options.append(joinedload(Order.shipping_address))
+    return options
+
+
+def _order_serializer(fields, includes):
+    serialize = serializer_for(fields)
+    if not includes:
+        return serialize
+
+    def serialize_item(item):
+        data = item.serialize()
+        if "items.product" in includes:
+            data["product"] = item.product.serialize() if item.product else None
+        return data
+
+    def serialize_order(order):
+        data = serialize(order)
+        if "items" in includes:
+            items = sorted(order.order_items, key=lambda item: item.id)
+            data["items"] = [serialize_item(item) for item in items]
+        if "payments" in includes:
+            payments = sorted(order.payments, key=lambda payment: payment.id)
+            data["payments"] = [payment.serialize() for payment in payments]
+        if "shipping_address" in includes:
+            address = order.shipping_address
+            data["shipping_address"] = address.serialize() if address else None
+        return data
+
+    return serialize_order
+
+
+def _order_query(*extra_columns):
+    """Order query with ?fields and ?include applied, its serializer and includes"""
+    query = Order.query
+    fields = parse_fields(Order)
+    includes = parse_includes(ORDER_INCLUDES)
+    if fields is not None:
+        query = load_only_fields(query, Order, fields, *extra_columns)
+    if includes:
+        query = query.options(*_include_options(includes))
+    return query, _order_serializer(fields, includes), includes
+
 @order_bp.route("/orders", methods=["GET"])
 def get_orders():
     try:
-        query = Order.query
-        orders = [order.serialize() for order in query.all()]
+        query, serializer, includes = _order_query()
+
+        if bool_arg("stream") and includes:
+            # The eager loads are extra queries: run them per keyset batch,
+            # never while a server-side cursor is open
+            return APIResponse.stream_batches(
+                query,
+                Order.id,
+                lambda orders: [serializer(order) for order in orders],
+                message="Orders retrieved successfully",
+            )
+        if bool_arg("stream"):
+            return APIResponse.stream(
+                query.order_by(Order.id),
+                message="Orders retrieved successfully",
+                serializer=serializer,
+            )
+
+        orders = [serializer(order) for order in query.all()]
         
         return APIResponse.success(
             data=orders, message="Orders retrieved successfully", status_code=200
         )
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
     except Exception as e:
         return APIResponse.error(message=f"Failed to get orders: {e}", status_code=400, error_code=500)
     
@@ -22,20 +116,165 @@ def get_orders():
 @order_bp.route("/orders/<int:order_id>", methods=["GET"])
 def get_order(order_id: int):
     try:
-        order = Order.query.get(order_id)
+        query, serializer, _ = _order_query()
+
+        order = query.filter(Order.id == order_id).first()
         if not order:
             return APIResponse.error(message="Order not found", status_code=400, error_code=404)
-        order_data = order.serialize()
 
         return APIResponse.success(
-            data=order_data,
+            data=serializer(order),
             message="Order retrieved successfully",
             status_code=200
         )
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
     except Exception as e:
         return APIResponse.error(message=f"Failed to retrieve order: {e}", status_code=400, errpr_code=404)
 
+def _status_filter():
+    raw = request.args.get("status")
+    if not raw:
+        return None
+    try:
+        return [OrderStatus(value.strip().upper()) for value in raw.split(",") if value.strip()]
+    except ValueError:
+        allowed = ", ".join(status.value for status in OrderStatus)
+        raise QueryParamError(f"status must be one of: {allowed}")
+
+
+@order_bp.route("/users/<int:user_id>/orders", methods=["GET"])
+def get_user_orders(user_id: int):
+    """
+    Order history of one user, newest first by default.
+
+    Served from the (user_id, order_date, id) index with keyset paging, so a
+    page costs one index range scan however many orders the account has.
+    Accepts status (comma-separated), from/to (order_date >= from, < to),
+    sort, limit, cursor, fields and include.
+    """
+    try:
+        sort = request.args.get("sort", "-order_date")
+        if sort not in ORDER_HISTORY_SORTS:
+            return APIResponse.error(message=f"Unsupported sort: {sort}", status_code=400)
+        sort_column, descending = ORDER_HISTORY_SORTS[sort]
+        limit = get_page_size()
+        statuses = _status_filter()
+        date_from = datetime_arg("from")
+        date_to = datetime_arg("to")
+
+        if db.session.query(User.id).filter(User.id == user_id).scalar() is None:
+            return APIResponse.error(message="User not found", status_code=400, error_code=404)
+
+        query, serializer, _ = _order_query(sort_column)
+        query = query.filter(Order.user_id == user_id)
+        if statuses:
+            query = query.filter(Order.status.in_(statuses))
+        if date_from is not None:
+            query = query.filter(Order.order_date >= date_from)
+        if date_to is not None:
+            query = query.filter(Order.order_date < date_to)
+
+        rows, next_cursor = keyset_page(
+            query,
+            sort_key=sort,
+            sort_column=sort_column,
+            id_column=Order.id,
+            limit=limit,
+            cursor=request.args.get("cursor"),
+            descending=descending,
+        )
+
+        return APIResponse.success(
+            data=[serializer(order) for order in rows],
+            message="Orders retrieved successfully",
+            status_code=200,
+            meta={"limit": limit, "next_cursor": next_cursor},
+        )
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to get user orders: {e}", status_code=400, error_code=500)
+
+
+@order_bp.route("/orders/<int:order_id>/items", methods=["POST"])
+@idempotent
+def create_order_items(order_id: int):
+    """
+    Add many lines to an order in one transaction.
+
+    Body: {"items": [{"product_id": 1, "quantity": 2, "price_per_unit": "9.99"}]}
+    (price_per_unit defaults to the catalog price). Products already on the
+    order are merged by adding quantities at their stored price (a different
+    price_per_unit for them is a 409); total_amount is recomputed.
+    """
+    try:
+        data = request.get_json() or {}
+        order, items = add_order_items(
+            order_id, data.get("items"), max_lines=current_app.config["ORDER_ITEMS_BULK_MAX"]
+        )
+
+        return APIResponse.success(
+            data={**order.serialize(), "items": [item.serialize() for item in items]},
+            message="Order items added successfully",
+            status_code=201,
+        )
+    except CheckoutError as e:
+        return APIResponse.error(message=e.message, status_code=e.status_code, details=e.details)
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to add order items: {e}", status_code=400, error_code=500)
+
+
+@order_bp.route("/orders/transitions", methods=["POST"])
+def create_order_transitions():
+    """
+    Move a batch of orders to one status.
+
+    Body: {"order_ids": [...], "status": "SHIPPED"}. Every id gets a result,
+    "applied" or "rejected" with the reason; moves not allowed by
+    ORDER_TRANSITIONS are rejected rather than failing the whole batch.
+    """
+    try:
+        data = request.get_json() or {}
+        order_ids = data.get("order_ids")
+        if not isinstance(order_ids, list) or not order_ids:
+            return APIResponse.error(message="order_ids must be a non-empty list", status_code=400)
+        try:
+            order_ids = [int(order_id) for order_id in order_ids]
+        except (TypeError, ValueError):
+            return APIResponse.error(message="order_ids must be integers", status_code=400)
+        maximum = current_app.config["ORDER_TRANSITION_MAX"]
+        if len(order_ids) > maximum:
+            return APIResponse.error(
+                message=f"At most {maximum} orders per request", status_code=400
+            )
+        try:
+            target = OrderStatus(str(data.get("status", "")).upper())
+        except ValueError:
+            allowed = ", ".join(status.value for status in OrderStatus)
+            return APIResponse.error(message=f"status must be one of: {allowed}", status_code=400)
+
+        results = transition_orders(
+            order_ids, target, chunk_size=current_app.config["ORDER_TRANSITION_CHUNK_SIZE"]
+        )
+        applied = sum(1 for result in results if result["result"] == "applied")
+
+        return APIResponse.success(
+            data={
+                "status": target.value,
+                "applied": applied,
+                "rejected": len(results) - applied,
+                "results": results,
+            },
+            message="Order transitions processed",
+            status_code=200,
+        )
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to transition orders: {e}", status_code=400, error_code=500)
+
+
 @order_bp.route("/orders", methods=["POST"])
+@idempotent
 def create_order():
     try:
         data = request.get_json()
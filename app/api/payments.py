@@ -1,8 +1,14 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 
 from app.extensions import db
 from app.models.payment import Payment
+from app.models.payment_reconciliation import PaymentReconciliation, ReconciliationMismatch
 from app.utils.api_helpers import APIResponse
+from app.utils.idempotency import idempotent
+from app.utils.pagination import get_page_size, keyset_page
+from app.utils.product_import import FORMATS, detect_format
+from app.utils.query_params import QueryParamError, bool_arg, int_arg
+from app.utils.reconciliation import ReconciliationError, reconcile_payments, start_reconciliation
 
 payment_bp = Blueprint("payments", __name__)
 
@@ -13,12 +19,19 @@ def get_payments():
     try:
         # from User select *
         query = Payment.query
+        if bool_arg("stream"):
+            return APIResponse.stream(
+                query.order_by(Payment.id), message="Payments retrieved successfully"
+            )
+
         payments = [payment.serialize() for payment in query.all()]
 
         return APIResponse.success(
             data=payments, message="Payments retrieved successfully", status_code=200
         )
 
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
     except Exception as e:
         return APIResponse.error(message=f"Failed to get payments: {e}", status_code=400, error_code=500)
 
@@ -40,6 +53,7 @@ def get_payment(payment_id:int):
         return APIResponse.error(message=f"Failed to retrieve payment: {e}", status_code=400, error_code=404)
 
 @payment_bp.route("/payments", methods=["POST"])
+@idempotent
 def create_payment():
     try:
         data = request.get_json()
@@ -67,3 +81,101 @@ def create_payment():
             status_code=400,
             error_code=500
         )
+
+
+@payment_bp.route("/payments/reconciliations", methods=["POST"])
+# @admin_required
+def create_reconciliation():
+    """
+    Reconcile payments against a gateway settlement file.
+
+    The file (CSV or NDJSON with transaction_id, amount, status) is the raw
+    body or a multipart "file" field and is streamed, never loaded whole.
+    ?apply=true corrects payment statuses to the gateway's; ?resume=<id>
+    continues an interrupted run after its last committed chunk (send the
+    same file again).
+    """
+    try:
+        upload = request.files.get("file")
+        stream = upload.stream if upload else request.stream
+        fmt = request.args.get("format") or detect_format(
+            upload.content_type if upload else request.content_type,
+            upload.filename if upload else None,
+        )
+        if fmt not in FORMATS:
+            return APIResponse.error(
+                message="Unknown settlement format, use format=ndjson or format=csv", status_code=400
+            )
+
+        chunk_size = int_arg("chunk_size", current_app.config["RECONCILE_CHUNK_SIZE"])
+        if chunk_size < 1:
+            return APIResponse.error(message="chunk_size must be greater than 0", status_code=400)
+        chunk_size = min(chunk_size, current_app.config["RECONCILE_CHUNK_SIZE_MAX"])
+
+        name = request.args.get("name") or (upload.filename if upload else None) or "settlement"
+        run = start_reconciliation(name, bool_arg("apply", False), int_arg("resume"))
+        run = reconcile_payments(stream, fmt, run, chunk_size)
+
+        return APIResponse.success(
+            data=run.serialize(), message="Payments reconciled", status_code=200
+        )
+    except (QueryParamError, ReconciliationError) as e:
+        return APIResponse.error(message=str(e), status_code=400)
+    except Exception as e:
+        db.session.rollback()
+        return APIResponse.error(message=f"Failed to reconcile payments: {e}", status_code=400, error_code=500)
+
+
+@payment_bp.route("/payments/reconciliations/<int:reconciliation_id>", methods=["GET"])
+# @admin_required
+def get_reconciliation(reconciliation_id: int):
+    try:
+        run = db.session.get(PaymentReconciliation, reconciliation_id)
+        if not run:
+            return APIResponse.error(message="Reconciliation not found", status_code=400, error_code=404)
+
+        return APIResponse.success(
+            data=run.serialize(), message="Reconciliation retrieved successfully", status_code=200
+        )
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to retrieve reconciliation: {e}", status_code=400, error_code=500)
+
+
+@payment_bp.route("/payments/reconciliations/<int:reconciliation_id>/mismatches", methods=["GET"])
+# @admin_required
+def get_reconciliation_mismatches(reconciliation_id: int):
+    """Mismatch report of a run, cursor-paginated; ?kind=missing|amount|status|invalid"""
+    try:
+        limit = get_page_size()
+        query = ReconciliationMismatch.query.filter(
+            ReconciliationMismatch.reconciliation_id == reconciliation_id
+        )
+        kind = request.args.get("kind")
+        if kind:
+            query = query.filter(ReconciliationMismatch.kind == kind)
+
+        if bool_arg("stream"):
+            return APIResponse.stream(
+                query.order_by(ReconciliationMismatch.id),
+                message="Mismatches retrieved successfully",
+            )
+
+        rows, next_cursor = keyset_page(
+            query,
+            sort_key="id",
+            sort_column=ReconciliationMismatch.id,
+            id_column=ReconciliationMismatch.id,
+            limit=limit,
+            cursor=request.args.get("cursor"),
+        )
+
+        return APIResponse.success(
+            data=[row.serialize() for row in rows],
+            message="Mismatches retrieved successfully",
+            status_code=200,
+            meta={"limit": limit, "next_cursor": next_cursor},
+        )
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to get mismatches: {e}", status_code=400, error_code=500)
@@ -1,13 +1,65 @@
 from flasgger import swag_from
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import func, inspect
 
-from app.extensions import db
+from app.extensions import catalog_cache, db
 from app.models.product import Product
 from app.utils.api_helpers import APIResponse
+from app.utils.autocomplete import product_autocomplete
+from app.utils.conditional import conditional, make_etag, query_fingerprint
+from app.utils.facets import product_facets
+from app.utils.fieldsets import load_only_fields, parse_fields, project, serializer_for
+from app.utils.pagination import get_page_size, keyset_page
+from app.utils.product_import import FORMATS, detect_format, import_products
+from app.utils.product_listing import PRODUCT_HIDDEN_FIELDS, PRODUCT_SORTS, in_stock_filters
+from app.utils.query_params import QueryParamError, bool_arg, decimal_arg, int_arg
+from app.utils.sales import METRICS, top_products
+from app.utils.search import search_products
 
 product_bp = Blueprint("products", __name__)
 
 
+
+def _product_cache_keys(product):
+    """Cached entries a committed product change makes stale"""
+    keys = [("product", product.id), ("category_stats", product.category_id)]
+    # A product moved to another category also changes the old one's stats
+    for old_category_id in inspect(product).attrs.category_id.history.deleted:
+        keys.append(("category_stats", old_category_id))
+    return keys
+
+
+catalog_cache.watch(Product, _product_cache_keys)
+
+def _catalog_version():
+    """
+    Cheap probe that changes whenever any product is added, removed or
+    updated: MAX(updated_at) is served from idx_products_updated_at.
+    """
+    return db.session.query(func.max(Product.updated_at), func.count(Product.id)).one()
+
+
+def _listing_filters():
+    """
+    Parse the storefront filters of GET /products.
+
+    Returns (base_filters, category_id, price_filters) so facets can drop the
+    category and price conditions while keeping the rest.
+    """
+    category_id = int_arg("category_id")
+    min_price = decimal_arg("min_price")
+    max_price = decimal_arg("max_price")
+    base_filters = in_stock_filters()
+
+    price_filters = []
+    if min_price is not None:
+        price_filters.append(Product.price >= min_price)
+    if max_price is not None:
+        price_filters.append(Product.price <= max_price)
+
+    return base_filters, category_id, price_filters
+
+
 @product_bp.route("/products", methods=["GET"])
 def get_products():
     """
@@ -15,10 +67,57 @@ def get_products():
     ---
     tags:
       - Products
-    summary: Retrieve all products
-    description: Get a list of all products in the system
+    summary: Retrieve products
+    description: Get a page of products using cursor (keyset) pagination
     produces:
       - application/json
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        description: Page size (capped at PAGE_SIZE_MAX)
+        example: 20
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: Opaque cursor taken from meta.next_cursor of the previous page
+      - in: query
+        name: sort
+        type: string
+        required: false
+        enum: [created_at, -created_at, price, -price]
+        default: created_at
+        description: Sort order, prefix with "-" for descending
+      - in: query
+        name: category_id
+        type: integer
+        required: false
+        description: Only products in this category
+      - in: query
+        name: min_price
+        type: number
+        required: false
+      - in: query
+        name: max_price
+        type: number
+        required: false
+      - in: query
+        name: in_stock
+        type: boolean
+        required: false
+        description: true for stock_quantity > 0, false for sold-out products
+      - in: query
+        name: stream
+        type: boolean
+        required: false
+        description: Stream every matching product (ignores limit/cursor, no meta) for exports
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: Comma-separated columns to return, e.g. id,name,price,sku. Only these columns are selected from the database.
     responses:
       200:
         description: Products retrieved successfully
@@ -69,6 +168,20 @@ def get_products():
                     type: string
                     format: date-time
                     example: "2024-01-01T12:00:00Z"
+            meta:
+              type: object
+              properties:
+                limit:
+                  type: integer
+                  example: 20
+                next_cursor:
+                  type: string
+                  example: "eyJrIjoiY3JlYXRlZF9hdCIsInYiOnsiZHQiOiIyMDI0LTAxLTAxVDEyOjAwOjAwIn0sImlkIjoyMH0"
+                facets:
+                  type: object
+                  description: Category and price-bucket counts, returned on the first page only
+      400:
+        description: Invalid limit, sort, cursor or filter
       500:
         description: Failed to get products
         schema:
@@ -82,16 +195,349 @@ def get_products():
               example: "Failed to get products: Error message"
     """
     try:
-        # from User select *
-        query = Product.query
-        products = [product.serialize() for product in query.all()]
+        sort = request.args.get("sort", "created_at")
+        if sort not in PRODUCT_SORTS:
+            return APIResponse.error(message=f"Unsupported sort: {sort}", status_code=400)
+        sort_column, descending = PRODUCT_SORTS[sort]
+
+        limit = get_page_size()
+        cursor = request.args.get("cursor")
+        stream = bool_arg("stream")
+        fields = parse_fields(Product, hidden=PRODUCT_HIDDEN_FIELDS)
+        serializer = serializer_for(fields)
+        base_filters, category_id, price_filters = _listing_filters()
+
+        last_modified, total = _catalog_version()
+        etag = make_etag("products", last_modified, total, query_fingerprint())
+
+        def build():
+            query = Product.query.filter(*base_filters, *price_filters)
+            if category_id is not None:
+                query = query.filter(Product.category_id == category_id)
+            if fields is not None:
+                query = load_only_fields(query, Product, fields, sort_column)
+
+            if stream:
+                # Export mode: every matching row in sort order, no page cap
+                order = sort_column.desc() if descending else sort_column.asc()
+                id_order = Product.id.desc() if descending else Product.id.asc()
+                return APIResponse.stream(
+                    query.order_by(order, id_order),
+                    message="Products retrieved successfully",
+                    serializer=serializer,
+                )
+
+            rows, next_cursor = keyset_page(
+                query,
+                sort_key=sort,
+                sort_column=sort_column,
+                id_column=Product.id,
+                limit=limit,
+                cursor=cursor,
+                descending=descending,
+            )
+            products = [serializer(product) for product in rows]
+
+            meta = {"limit": limit, "next_cursor": next_cursor}
+            # Facets do not change between pages, so only the first page pays for them
+            if not cursor:
+                meta["facets"] = product_facets(base_filters, category_id, price_filters)
+
+            return APIResponse.success(
+                data=products,
+                message="Products retrieved successfully",
+                status_code=200,
+                meta=meta,
+            )
+
+        return conditional(etag, last_modified, build)
+
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to get products: {e}", status_code=400, error_code=500)
+
+@product_bp.route("/products/search", methods=["GET"])
+def search_product_catalog():
+    """
+    Full-text product search
+    ---
+    tags:
+      - Products
+    summary: Search products by name and description
+    description: Relevance-ranked search backed by SQLite FTS5 or a MySQL FULLTEXT index. Name matches rank above description matches.
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: q
+        type: string
+        required: true
+        description: Search words; the last word also matches as a prefix
+        example: "iphone pro"
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        description: Page size (capped at PAGE_SIZE_MAX)
+      - in: query
+        name: page
+        type: integer
+        required: false
+        default: 1
+        description: 1-based result page
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: Comma-separated columns to return, e.g. id,name,price,sku. Only these columns are selected from the database.
+    responses:
+      200:
+        description: Matching products, best match first, with meta.has_more
+      400:
+        description: Missing query or invalid paging parameters
+      500:
+        description: Failed to search products
+    """
+    try:
+        q = request.args.get("q", "").strip()
+        if not q:
+            return APIResponse.error(message="Query parameter q is required", status_code=400)
+
+        limit = get_page_size()
+        try:
+            page = int(request.args.get("page", 1))
+        except ValueError:
+            return APIResponse.error(message="page must be an integer", status_code=400)
+        if page < 1:
+            return APIResponse.error(message="page must be greater than 0", status_code=400)
+        fields = parse_fields(Product, hidden=PRODUCT_HIDDEN_FIELDS)
+        serializer = serializer_for(fields)
+
+        last_modified, total = _catalog_version()
+        etag = make_etag("products/search", last_modified, total, query_fingerprint())
+
+        def build():
+            products, has_more = search_products(
+                q, limit=limit, offset=(page - 1) * limit, fields=fields
+            )
+            return APIResponse.success(
+                data=[serializer(product) for product in products],
+                message="Products retrieved successfully",
+                status_code=200,
+                meta={"limit": limit, "page": page, "has_more": has_more},
+            )
+
+        return conditional(etag, last_modified, build)
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to search products: {e}", status_code=400, error_code=500)
+
+def _batch_keys(raw, cast):
+    keys = []
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            keys.append(cast(part))
+        except ValueError:
+            raise QueryParamError(f"Invalid value in batch: {part}")
+    return list(dict.fromkeys(keys))
+
+
+@product_bp.route("/products/batch", methods=["GET"])
+def get_products_batch():
+    """
+    Get several products in one call
+    ---
+    tags:
+      - Products
+    summary: Multi-get products by id or SKU
+    description: Resolves all requested products with a single IN query (ids are served from the catalog cache first). Results follow the request order; ids or SKUs that do not exist are listed in meta.missing.
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: ids
+        type: string
+        required: false
+        description: Comma-separated product ids
+        example: "1,2,3"
+      - in: query
+        name: skus
+        type: string
+        required: false
+        description: Comma-separated SKUs (used when ids is absent)
+        example: "MBA-M2-256,IP15P-128-TB"
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: Comma-separated columns to return
+    responses:
+      200:
+        description: Products in request order, with meta.missing
+      400:
+        description: No ids/skus, too many values or invalid id
+      500:
+        description: Failed to retrieve products
+    """
+    try:
+        fields = parse_fields(Product, hidden=PRODUCT_HIDDEN_FIELDS)
+        raw_ids = request.args.get("ids")
+        raw_skus = request.args.get("skus")
+        if raw_ids:
+            keys = _batch_keys(raw_ids, int)
+        elif raw_skus:
+            keys = _batch_keys(raw_skus, str)
+        else:
+            return APIResponse.error(message="Pass ids or skus", status_code=400)
+
+        maximum = current_app.config["BATCH_GET_MAX"]
+        if len(keys) > maximum:
+            return APIResponse.error(
+                message=f"At most {maximum} products per batch", status_code=400
+            )
+
+        if raw_ids:
+            def load(missing):
+                product_ids = [key[1] for key in missing]
+                rows = Product.query.filter(Product.id.in_(product_ids))
+                return {("product", row.id): row.serialize() for row in rows}
+
+            cached = catalog_cache.get_many_or_load([("product", key) for key in keys], load)
+            found = {key: cached.get(("product", key)) for key in keys}
+        else:
+            rows = Product.query.filter(Product.sku.in_(keys))
+            found = {row.sku: row.serialize() for row in rows}
+
+        products = [found[key] for key in keys if found.get(key)]
+        if fields:
+            products = [project(product, fields) for product in products]
+
+        return APIResponse.success(
+            data=products,
+            message="Products retrieved successfully",
+            status_code=200,
+            meta={"missing": [key for key in keys if not found.get(key)]},
+        )
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to retrieve products: {e}", status_code=400, error_code=500)
+
+@product_bp.route("/products/top", methods=["GET"])
+def get_top_products():
+    """
+    Best-selling products
+    ---
+    tags:
+      - Products
+    summary: Top sellers overall, per category or over the last N days
+    description: Served entirely from the product_sales_daily rollup, which is updated as order items are created.
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: metric
+        type: string
+        enum: [units, revenue]
+        default: units
+      - in: query
+        name: days
+        type: integer
+        required: false
+        description: Only count the last N days (including today); omit for all time
+        example: 7
+      - in: query
+        name: category_id
+        type: integer
+        required: false
+      - in: query
+        name: limit
+        type: integer
+        default: 10
+    responses:
+      200:
+        description: Ranked list of product_id, units and revenue
+      400:
+        description: Invalid metric, days or limit
+      500:
+        description: Failed to get top products
+    """
+    try:
+        metric = request.args.get("metric", "units")
+        if metric not in METRICS:
+            return APIResponse.error(message=f"Unsupported metric: {metric}", status_code=400)
+        days = int_arg("days")
+        if days is not None and days < 1:
+            return APIResponse.error(message="days must be greater than 0", status_code=400)
+        limit = int_arg("limit", 10)
+        if limit < 1:
+            return APIResponse.error(message="limit must be greater than 0", status_code=400)
+        limit = min(limit, current_app.config["TOP_PRODUCTS_MAX"])
+
+        ranking = top_products(
+            metric=metric, days=days, category_id=int_arg("category_id"), limit=limit
+        )
 
         return APIResponse.success(
-            data=products, message="Products retrieved successfully", status_code=200
+            data=ranking, message="Top products retrieved successfully", status_code=200
         )
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to get top products: {e}", status_code=400, error_code=500)
 
+@product_bp.route("/products/autocomplete", methods=["GET"])
+def autocomplete_products():
+    """
+    Product name autocomplete
+    ---
+    tags:
+      - Products
+    summary: Search-as-you-type suggestions
+    description: Served from an in-memory prefix index of product names (any word of the name may match), ranked by units sold.
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: prefix
+        type: string
+        required: true
+        example: "mac"
+      - in: query
+        name: limit
+        type: integer
+        default: 10
+    responses:
+      200:
+        description: Suggestions with id, name and popularity score
+      400:
+        description: Missing prefix or invalid limit
+      500:
+        description: Failed to autocomplete products
+    """
+    try:
+        prefix = request.args.get("prefix", "")
+        if not prefix.strip():
+            return APIResponse.error(message="Query parameter prefix is required", status_code=400)
+        limit = int_arg("limit", 10)
+        if limit < 1:
+            return APIResponse.error(message="limit must be greater than 0", status_code=400)
+        limit = min(limit, current_app.config["AUTOCOMPLETE_MAX_RESULTS"])
+
+        return APIResponse.success(
+            data=product_autocomplete.lookup(prefix, limit),
+            message="Suggestions retrieved successfully",
+            status_code=200,
+        )
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
     except Exception as e:
-        return APIResponse.error(message=f"Failed to get products: {e}", status_code=400, error_code=500)
+        return APIResponse.error(message=f"Failed to autocomplete products: {e}", status_code=400, error_code=500)
 
 @product_bp.route("/products/<int:product_id>", methods=["GET"])
 def get_product(product_id: int):
@@ -111,6 +557,11 @@ def get_product(product_id: int):
         required: true
         description: Product ID
         example: 1
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: Comma-separated columns to return, e.g. id,name,price,sku. Only these columns are selected from the database.
     responses:
       200:
         description: Product retrieved successfully
@@ -175,17 +626,27 @@ def get_product(product_id: int):
               example: "Failed to retrieve product: Error message"
     """
     try:
-        product = Product.query.get(product_id)
+        fields = parse_fields(Product, hidden=PRODUCT_HIDDEN_FIELDS)
 
-        if not product:
+        def load():
+            product = Product.query.get(product_id)
+            return product.serialize() if product else None
+
+        product_data = catalog_cache.get_or_load(("product", product_id), load)
+        if not product_data:
             return APIResponse.error(message="Product not found", status_code=400, error_code=404)
-        product_data = product.serialize()
 
-        return APIResponse.success(
-            data=product_data,
-            message="Product retrieved successfully",
-            status_code=200
+        return conditional(
+            make_etag("product", product_id, product_data["updated_at"], fields),
+            product_data["updated_at"],
+            lambda: APIResponse.success(
+                data=project(product_data, fields) if fields else product_data,
+                message="Product retrieved successfully",
+                status_code=200
+            ),
         )
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
     except Exception as e:
         return APIResponse.error(message=f"Failed to retrieve product: {e}", status_code=400, error_code=500)
 
@@ -339,3 +800,75 @@ def create_product():
             status_code=400,
             error_code=500
         )
+
+
+@product_bp.route("/products/import", methods=["POST"])
+# @admin_required
+def import_product_catalog():
+    """
+    Bulk import products
+    ---
+    tags:
+      - Products
+    summary: Stream an NDJSON or CSV catalog and upsert products by SKU
+    description: >
+      Send the file as the raw request body (Content-Type application/x-ndjson
+      or text/csv) or as a multipart "file" field. Rows are validated one by
+      one and written in batches; invalid rows are reported, not fatal.
+    consumes:
+      - application/x-ndjson
+      - text/csv
+      - multipart/form-data
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: format
+        type: string
+        enum: [ndjson, csv]
+        required: false
+        description: Overrides the format detected from Content-Type / file name
+      - in: query
+        name: batch_size
+        type: integer
+        required: false
+        description: Rows per upsert statement and commit (capped at IMPORT_BATCH_SIZE_MAX)
+    responses:
+      200:
+        description: Import finished; data holds counts, per-row errors and rows_per_second
+      400:
+        description: Unknown format or invalid batch_size
+      500:
+        description: Failed to import products
+    """
+    try:
+        upload = request.files.get("file")
+        stream = upload.stream if upload else request.stream
+        fmt = request.args.get("format") or detect_format(
+            upload.content_type if upload else request.content_type,
+            upload.filename if upload else None,
+        )
+        if fmt not in FORMATS:
+            return APIResponse.error(
+                message="Unknown import format, use format=ndjson or format=csv", status_code=400
+            )
+
+        batch_size = int_arg("batch_size", current_app.config["IMPORT_BATCH_SIZE"])
+        if batch_size < 1:
+            return APIResponse.error(message="batch_size must be greater than 0", status_code=400)
+        batch_size = min(batch_size, current_app.config["IMPORT_BATCH_SIZE_MAX"])
+
+        result = import_products(
+            stream, fmt, batch_size, max_errors=current_app.config["IMPORT_MAX_ERRORS"]
+        )
+
+        return APIResponse.success(
+            data=result.serialize(),
+            message="Products imported",
+            status_code=200,
+        )
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
+    except Exception as e:
+        db.session.rollback()
+        return APIResponse.error(message=f"Failed to import products: {e}", status_code=400, error_code=500)
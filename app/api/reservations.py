@@ -0,0 +1,250 @@
+from flask import Blueprint, current_app, request
+
+from app.models.inventory_reservation import InventoryReservation
+from app.utils.api_helpers import APIResponse
+from app.utils.checkout import CheckoutError
+from app.utils.reservations import availability, confirm, release, reserve
+
+reservation_bp = Blueprint("reservations", __name__)
+
+
+@reservation_bp.route("/reservations", methods=["POST"])
+def create_reservations():
+    """
+    Hold stock for a cart
+    ---
+    tags:
+      - Reservations
+    summary: Reserve stock for a set of products until the TTL runs out
+    description: >
+      All lines are held or none is. Held units are subtracted from the
+      stock other buyers (and checkout) can take until the hold is
+      confirmed, released or expires.
+    consumes:
+      - application/json
+    produces:
+      - application/json
+    parameters:
+      - in: body
+        name: reservation_data
+        required: true
+        schema:
+          type: object
+          required: [items]
+          properties:
+            order_id:
+              type: integer
+              example: 1
+            ttl_seconds:
+              type: integer
+              example: 900
+            items:
+              type: array
+              items:
+                type: object
+                required: [product_id, quantity]
+                properties:
+                  product_id:
+                    type: integer
+                    example: 1
+                  quantity:
+                    type: integer
+                    example: 2
+    responses:
+      201:
+        description: Stock reserved; data lists one reservation per product
+      400:
+        description: Invalid cart or unknown products
+      404:
+        description: Order not found
+      409:
+        description: Insufficient stock; details.shortages lists the lines
+    """
+    try:
+        data = request.get_json() or {}
+        ttl_seconds = data.get("ttl_seconds", current_app.config["RESERVATION_TTL_SECONDS"])
+        try:
+            ttl_seconds = int(ttl_seconds)
+        except (TypeError, ValueError):
+            return APIResponse.error(message="ttl_seconds must be an integer", status_code=400)
+        if not 0 < ttl_seconds <= current_app.config["RESERVATION_TTL_MAX"]:
+            return APIResponse.error(
+                message=f"ttl_seconds must be between 1 and {current_app.config['RESERVATION_TTL_MAX']}",
+                status_code=400,
+            )
+        order_id = data.get("order_id")
+        try:
+            order_id = int(order_id) if order_id is not None else None
+        except (TypeError, ValueError):
+            return APIResponse.error(message="order_id must be an integer", status_code=400)
+
+        reservations = reserve(data.get("items"), ttl_seconds, order_id=order_id)
+
+        return APIResponse.success(
+            data=[reservation.serialize() for reservation in reservations],
+            message="Stock reserved successfully",
+            status_code=201,
+        )
+    except CheckoutError as e:
+        return APIResponse.error(message=e.message, status_code=e.status_code, details=e.details)
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to reserve stock: {e}", status_code=400, error_code=500)
+
+
+@reservation_bp.route("/reservations/confirm", methods=["POST"])
+def confirm_reservations():
+    """
+    Confirm holds for an order
+    ---
+    tags:
+      - Reservations
+    summary: Turn active holds into sold stock
+    description: All holds must still be active, otherwise nothing is confirmed.
+    consumes:
+      - application/json
+    produces:
+      - application/json
+    parameters:
+      - in: body
+        name: confirm_data
+        required: true
+        schema:
+          type: object
+          required: [reservation_ids, order_id]
+          properties:
+            reservation_ids:
+              type: array
+              items:
+                type: integer
+              example: [1, 2]
+            order_id:
+              type: integer
+              example: 1
+    responses:
+      200:
+        description: Holds confirmed and stock decremented
+      404:
+        description: Order not found
+      409:
+        description: Some holds expired, were released or already confirmed
+    """
+    try:
+        data = request.get_json() or {}
+        try:
+            order_id = int(data["order_id"])
+        except (KeyError, TypeError, ValueError):
+            return APIResponse.error(message="order_id is a required integer", status_code=400)
+
+        confirmed = confirm(data.get("reservation_ids"), order_id)
+
+        return APIResponse.success(
+            data={"order_id": order_id, "confirmed": confirmed},
+            message="Reservations confirmed successfully",
+            status_code=200,
+        )
+    except CheckoutError as e:
+        return APIResponse.error(message=e.message, status_code=e.status_code, details=e.details)
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to confirm reservations: {e}", status_code=400, error_code=500)
+
+
+@reservation_bp.route("/reservations/release", methods=["POST"])
+def release_reservations():
+    """
+    Release holds
+    ---
+    tags:
+      - Reservations
+    summary: Give held stock back (cart abandoned or payment failed)
+    description: Holds that are no longer active are reported as skipped.
+    consumes:
+      - application/json
+    produces:
+      - application/json
+    parameters:
+      - in: body
+        name: release_data
+        required: true
+        schema:
+          type: object
+          required: [reservation_ids]
+          properties:
+            reservation_ids:
+              type: array
+              items:
+                type: integer
+              example: [1, 2]
+    responses:
+      200:
+        description: Released and skipped reservation ids
+    """
+    try:
+        data = request.get_json() or {}
+        result = release(data.get("reservation_ids"))
+
+        return APIResponse.success(
+            data=result, message="Reservations released successfully", status_code=200
+        )
+    except CheckoutError as e:
+        return APIResponse.error(message=e.message, status_code=e.status_code, details=e.details)
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to release reservations: {e}", status_code=400, error_code=500)
+
+
+@reservation_bp.route("/reservations/<int:reservation_id>", methods=["GET"])
+def get_reservation(reservation_id: int):
+    try:
+        reservation = InventoryReservation.query.get(reservation_id)
+        if not reservation:
+            return APIResponse.error(message="Reservation not found", status_code=400, error_code=404)
+
+        return APIResponse.success(
+            data=reservation.serialize(),
+            message="Reservation retrieved successfully",
+            status_code=200,
+        )
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to retrieve reservation: {e}", status_code=400, error_code=500)
+
+
+@reservation_bp.route("/reservations/availability", methods=["GET"])
+def get_availability():
+    """
+    Available stock per product
+    ---
+    tags:
+      - Reservations
+    summary: stock_quantity minus units held by active reservations
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: product_ids
+        type: string
+        required: true
+        description: Comma-separated product ids
+    responses:
+      200:
+        description: Availability retrieved successfully
+      400:
+        description: Missing or invalid product_ids
+    """
+    try:
+        raw = request.args.get("product_ids", "")
+        try:
+            product_ids = [int(value) for value in raw.split(",") if value.strip()]
+        except ValueError:
+            return APIResponse.error(message="product_ids must be integers", status_code=400)
+        if not product_ids:
+            return APIResponse.error(message="product_ids is required", status_code=400)
+        maximum = current_app.config["BATCH_GET_MAX"]
+        if len(product_ids) > maximum:
+            return APIResponse.error(message=f"At most {maximum} product_ids per request", status_code=400)
+
+        return APIResponse.success(
+            data=availability(product_ids),
+            message="Availability retrieved successfully",
+            status_code=200,
+        )
+    except Exception as e:
+        return APIResponse.error(message=f"Failed to get availability: {e}", status_code=400, error_code=500)
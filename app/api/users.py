@@ -1,9 +1,14 @@
 from flask import Blueprint, jsonify, request
 from app.models.user import User
 from app.utils.api_helpers import APIResponse
+from app.utils.fieldsets import load_only_fields, parse_fields, serialize_fields, serializer_for
+from app.utils.query_params import QueryParamError, bool_arg
 
 user_bp = Blueprint("users", __name__)
 
+# Columns that ?fields= may never expose
+HIDDEN_FIELDS = ("password_hash",)
+
 
 @user_bp.route("/users", methods=["GET"])
 # @admin_required
@@ -11,12 +16,26 @@ def get_users():
     try:
         # from User select *
         query = User.query
-        items = [item.serialize() for item in query.all()]
+        fields = parse_fields(User, hidden=HIDDEN_FIELDS)
+        serializer = serializer_for(fields)
+        if fields is not None:
+            query = load_only_fields(query, User, fields)
+
+        if bool_arg("stream"):
+            return APIResponse.stream(
+                query.order_by(User.id),
+                message="Users retrieved successfully",
+                serializer=serializer,
+            )
+
+        items = [serializer(item) for item in query.all()]
 
         return APIResponse.success(
             data=items, message="Users retrieved successfully", status_code=200
         )
 
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
     except Exception as e:
         return APIResponse.error(
             message=f"Failed to get users: {e}", status_code=400, error_code=500
@@ -27,13 +46,18 @@ def get_users():
 # @admin_required
 def get_user(user_id: int):
     try:
-        user = User.query.get(user_id)
+        fields = parse_fields(User, hidden=HIDDEN_FIELDS)
+        query = User.query
+        if fields is not None:
+            query = load_only_fields(query, User, fields)
+
+        user = query.filter(User.id == user_id).first()
 
         if not user:
             error_response = {"success": False, "message": "User not found"}
             return jsonify(error_response), 404
 
-        user_data = user.serialize()
+        user_data = serialize_fields(user, fields) if fields else user.serialize()
 
         response = {
             "success": True,
@@ -43,6 +67,8 @@ def get_user(user_id: int):
 
         return jsonify(response), 200
 
+    except QueryParamError as e:
+        return APIResponse.error(message=str(e), status_code=400)
     except Exception as e:
         response = {
             "success": False,
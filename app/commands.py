@@ -0,0 +1,126 @@
+import os
+
+import click
+from flask import current_app
+
+from app.utils.category_tree import rebuild_category_paths
+from app.utils.idempotency import prune_idempotency_keys
+from app.utils.outbox import outbox_worker
+from app.utils.product_import import FORMATS, detect_format, import_products
+from app.utils.reconciliation import ReconciliationError, reconcile_payments, start_reconciliation
+from app.utils.reservations import sweep_expired
+from app.utils.revenue import fold_revenue_deltas, rebuild_revenue_rollups
+from app.utils.sales import rebuild_sales_rollup
+from app.utils.search import rebuild_search_index
+
+
+def register_commands(app):
+    """Attach maintenance commands to `flask --app application <command>`"""
+
+    @app.cli.command("search-reindex")
+    def search_reindex():
+        """Create and rebuild the product full-text search index."""
+        rebuild_search_index()
+        click.echo("Product search index rebuilt")
+
+    @app.cli.command("import-products")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--format", "fmt", type=click.Choice(FORMATS), help="Defaults to the file extension.")
+    @click.option("--batch-size", type=int, default=None, help="Rows per upsert and commit.")
+    def import_products_command(path, fmt, batch_size):
+        """Stream an NDJSON or CSV file into products, upserting by SKU."""
+        fmt = fmt or detect_format(filename=path)
+        if fmt is None:
+            raise click.UsageError("Cannot detect format from file name, pass --format")
+
+        with open(path, "rb") as stream:
+            result = import_products(
+                stream,
+                fmt,
+                batch_size or current_app.config["IMPORT_BATCH_SIZE"],
+                max_errors=current_app.config["IMPORT_MAX_ERRORS"],
+            ).serialize()
+
+        for error in result["errors"]:
+            click.echo(f"line {error['line']} ({error['sku']}): {error['error']}", err=True)
+        click.echo(
+            f"{result['upserted']} upserted, {result['failed']} failed "
+            f"in {result['elapsed_seconds']}s ({result['rows_per_second']} rows/s)"
+        )
+
+    @app.cli.command("rebuild-sales-rollup")
+    def rebuild_sales_rollup_command():
+        """Recompute product_sales_daily from order_items (backfill)."""
+        rows = rebuild_sales_rollup()
+        click.echo(f"product_sales_daily rebuilt with {rows} rows")
+
+    @app.cli.command("rebuild-revenue-rollups")
+    def rebuild_revenue_rollups_command():
+        """Recompute revenue_daily and revenue_hourly from orders and payments (backfill)."""
+        daily, hourly = rebuild_revenue_rollups()
+        click.echo(f"Revenue rollups rebuilt with {daily} daily and {hourly} hourly rows")
+
+    @app.cli.command("fold-revenue-deltas")
+    @click.option("--batch-size", type=int, default=None, help="Deltas folded per commit.")
+    def fold_revenue_deltas_command(batch_size):
+        """Fold pending revenue_deltas into the revenue rollups (also run in the background)."""
+        folded = fold_revenue_deltas(batch_size or current_app.config["REVENUE_FOLD_BATCH_SIZE"])
+        click.echo(f"Folded {folded} revenue deltas")
+
+    @app.cli.command("rebuild-category-paths")
+    def rebuild_category_paths_command():
+        """Recompute categories.path from parent_id (backfill after upgrading)."""
+        count = rebuild_category_paths()
+        click.echo(f"Rebuilt paths for {count} categories")
+
+    @app.cli.command("sweep-reservations")
+    @click.option("--batch-size", type=int, default=None, help="Holds released per commit.")
+    def sweep_reservations_command(batch_size):
+        """Expire inventory reservations past their TTL (also run in the background)."""
+        swept = sweep_expired(batch_size or current_app.config["RESERVATION_SWEEP_BATCH_SIZE"])
+        click.echo(f"Expired {swept} reservations")
+
+    @app.cli.command("prune-idempotency-keys")
+    @click.option("--batch-size", type=int, default=1000, help="Rows deleted per commit.")
+    def prune_idempotency_keys_command(batch_size):
+        """Delete Idempotency-Key records past IDEMPOTENCY_TTL_SECONDS."""
+        removed = prune_idempotency_keys(batch_size)
+        click.echo(f"Removed {removed} expired idempotency keys")
+
+    @app.cli.command("outbox-worker")
+    @click.option("--threads", type=int, default=None, help="Handler threads (default OUTBOX_WORKER_THREADS or 1).")
+    @click.option("--once", is_flag=True, help="Deliver everything that is due, then exit.")
+    def outbox_worker_command(threads, once):
+        """Deliver outbox events to their handlers until interrupted."""
+        outbox_worker.run(current_app._get_current_object(), threads=threads, once=once)
+        stats = outbox_worker.stats()
+        click.echo(f"{stats['delivered']} delivered, {stats['retried']} retried, {stats['failed']} failed")
+
+    @app.cli.command("reconcile-payments")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--format", "fmt", type=click.Choice(FORMATS), help="Defaults to the file extension.")
+    @click.option("--apply", "apply_fixes", is_flag=True, help="Correct payment statuses to the gateway's.")
+    @click.option("--resume", "resume_id", type=int, default=None, help="Continue an interrupted run.")
+    @click.option("--chunk-size", type=int, default=None, help="Settlement lines matched per query and commit.")
+    def reconcile_payments_command(path, fmt, apply_fixes, resume_id, chunk_size):
+        """Match a gateway settlement file against payments by transaction_id."""
+        fmt = fmt or detect_format(filename=path)
+        if fmt is None:
+            raise click.UsageError("Cannot detect format from file name, pass --format")
+
+        try:
+            run = start_reconciliation(os.path.basename(path), apply_fixes, resume_id)
+        except ReconciliationError as e:
+            raise click.UsageError(str(e))
+        click.echo(f"Reconciliation #{run.id} starting after line {run.lines_processed}")
+
+        with open(path, "rb") as stream:
+            run = reconcile_payments(
+                stream, fmt, run, chunk_size or current_app.config["RECONCILE_CHUNK_SIZE"]
+            )
+
+        click.echo(
+            f"{run.lines_processed} lines: {run.matched} matched, {run.missing} missing, "
+            f"{run.amount_mismatches} amount and {run.status_mismatches} status mismatches, "
+            f"{run.corrected} corrected, {run.invalid} invalid"
+        )
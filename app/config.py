@@ -19,6 +19,88 @@ class Config:
     # Session configuration
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
 
+    # Pagination - list endpoints return at most PAGE_SIZE_MAX rows per page
+    PAGE_SIZE_DEFAULT = int(os.environ.get("PAGE_SIZE_DEFAULT", 20))
+    PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", 100))
+    # Largest ?limit= for GET /api/products/top
+    TOP_PRODUCTS_MAX = int(os.environ.get("TOP_PRODUCTS_MAX", 100))
+    # Most ids/skus accepted by one GET /api/products/batch call
+    BATCH_GET_MAX = int(os.environ.get("BATCH_GET_MAX", 100))
+
+    # Lower bounds of the price buckets reported in product listing facets
+    PRICE_FACET_BUCKETS = [
+        int(bound)
+        for bound in os.environ.get("PRICE_FACET_BUCKETS", "0,25,50,100,250,500,1000").split(",")
+    ]
+
+    # In-process cache for product/category detail payloads
+    CATALOG_CACHE_SIZE = int(os.environ.get("CATALOG_CACHE_SIZE", 10000))
+    CATALOG_CACHE_TTL = int(os.environ.get("CATALOG_CACHE_TTL", 60))
+
+    # Product-name autocomplete index (rebuilt in full every N seconds)
+    AUTOCOMPLETE_REFRESH_SECONDS = int(os.environ.get("AUTOCOMPLETE_REFRESH_SECONDS", 300))
+    AUTOCOMPLETE_SCAN_LIMIT = int(os.environ.get("AUTOCOMPLETE_SCAN_LIMIT", 5000))
+    AUTOCOMPLETE_MAX_RESULTS = int(os.environ.get("AUTOCOMPLETE_MAX_RESULTS", 20))
+
+    # Bulk product import (POST /api/products/import, flask import-products)
+    IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", 1000))
+    IMPORT_BATCH_SIZE_MAX = int(os.environ.get("IMPORT_BATCH_SIZE_MAX", 10000))
+    IMPORT_MAX_ERRORS = int(os.environ.get("IMPORT_MAX_ERRORS", 100))
+
+    # Payment reconciliation against gateway settlement files
+    RECONCILE_CHUNK_SIZE = int(os.environ.get("RECONCILE_CHUNK_SIZE", 5000))
+    RECONCILE_CHUNK_SIZE_MAX = int(os.environ.get("RECONCILE_CHUNK_SIZE_MAX", 50000))
+    # A RUNNING run with no checkpoint for this long can be resumed
+    RECONCILE_STALE_SECONDS = int(os.environ.get("RECONCILE_STALE_SECONDS", 600))
+
+    # Password hashing (register/login): bcrypt cost and the bounded pool it
+    # runs on; PASSWORD_HASH_THREADS=0 uses one thread per CPU
+    BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+    PASSWORD_HASH_THREADS = int(os.environ.get("PASSWORD_HASH_THREADS", 0))
+    PASSWORD_HASH_QUEUE_MAX = int(os.environ.get("PASSWORD_HASH_QUEUE_MAX", 32))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get("PASSWORD_HASH_TIMEOUT", 10))
+
+    # Revenue analytics (GET /api/analytics/revenue): widest hourly window
+    REVENUE_HOURLY_MAX_DAYS = int(os.environ.get("REVENUE_HOURLY_MAX_DAYS", 31))
+    # Folding revenue_deltas into the rollups; interval 0 disables the thread
+    REVENUE_FOLD_INTERVAL = int(os.environ.get("REVENUE_FOLD_INTERVAL", 5))
+    REVENUE_FOLD_BATCH_SIZE = int(os.environ.get("REVENUE_FOLD_BATCH_SIZE", 5000))
+
+    # Checkout (POST /api/checkout): retries on lock timeouts/deadlocks
+    CHECKOUT_RETRIES = int(os.environ.get("CHECKOUT_RETRIES", 2))
+
+    # Bulk status changes (POST /api/orders/transitions)
+    ORDER_TRANSITION_MAX = int(os.environ.get("ORDER_TRANSITION_MAX", 10000))
+    ORDER_TRANSITION_CHUNK_SIZE = int(os.environ.get("ORDER_TRANSITION_CHUNK_SIZE", 1000))
+
+    # Lines accepted by one POST /api/orders/<id>/items
+    ORDER_ITEMS_BULK_MAX = int(os.environ.get("ORDER_ITEMS_BULK_MAX", 1000))
+
+    # Inventory reservations (stock holds); sweep interval 0 disables the thread
+    RESERVATION_TTL_SECONDS = int(os.environ.get("RESERVATION_TTL_SECONDS", 900))
+    RESERVATION_TTL_MAX = int(os.environ.get("RESERVATION_TTL_MAX", 3600))
+    RESERVATION_SWEEP_INTERVAL = int(os.environ.get("RESERVATION_SWEEP_INTERVAL", 60))
+    RESERVATION_SWEEP_BATCH_SIZE = int(os.environ.get("RESERVATION_SWEEP_BATCH_SIZE", 500))
+
+    # Idempotency-Key replay store for order/order item/payment creation
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", 86400))
+    IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", 5))
+    IDEMPOTENCY_LOCK_TIMEOUT = int(os.environ.get("IDEMPOTENCY_LOCK_TIMEOUT", 60))
+
+    # Outbox worker for order/payment side effects; 0 threads = run
+    # `flask outbox-worker` as a separate process instead
+    OUTBOX_WORKER_THREADS = int(os.environ.get("OUTBOX_WORKER_THREADS", 0))
+    OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 100))
+    OUTBOX_POLL_INTERVAL = float(os.environ.get("OUTBOX_POLL_INTERVAL", 1.0))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 10))
+    OUTBOX_BACKOFF_BASE = float(os.environ.get("OUTBOX_BACKOFF_BASE", 2))
+    OUTBOX_BACKOFF_MAX = float(os.environ.get("OUTBOX_BACKOFF_MAX", 3600))
+    OUTBOX_LEASE_SECONDS = int(os.environ.get("OUTBOX_LEASE_SECONDS", 300))
+
+    # Start the in-process background threads (reservation sweeper, outbox
+    # worker, autocomplete refresh, revenue folder) with the first request served
+    BACKGROUND_WORKERS = os.environ.get("BACKGROUND_WORKERS", "true").lower() in ("1", "true", "yes")
+
     # Additional configuration
     DEBUG = True
     TESTING = False
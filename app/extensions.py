@@ -1,4 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 
+from app.utils.cache import CatalogCache
 
-db = SQLAlchemy()
\ No newline at end of file
+
+db = SQLAlchemy()
+catalog_cache = CatalogCache()
@@ -1,20 +1,42 @@
 from .address import Address
 from .category import Category
+from .idempotency_key import IdempotencyKey
+from .inventory_reservation import InventoryReservation, ReservationStatus
 from .order_item import OrderItem
 from .order import Order, OrderStatus
+from .outbox_event import OutboxEvent, OutboxStatus
 from .payment import Payment, PaymentStatus
+from .payment_reconciliation import (
+    PaymentReconciliation,
+    ReconciliationMismatch,
+    ReconciliationStatus,
+)
 from .product import Product
+from .product_sales import ProductSalesDaily
+from .revenue import RevenueDaily, RevenueDelta, RevenueHourly
 from .user import User, UserRole
 
 __all__ = [
     "Address",
     "Category",
+    "IdempotencyKey",
+    "InventoryReservation",
     "OrderItem",
     "Order",
+    "OutboxEvent",
     "Payment",
+    "PaymentReconciliation",
     "Product",
+    "ProductSalesDaily",
+    "ReconciliationMismatch",
+    "RevenueDaily",
+    "RevenueDelta",
+    "RevenueHourly",
     "User",
     "OrderStatus",
+    "OutboxStatus",
     "PaymentStatus",
+    "ReconciliationStatus",
+    "ReservationStatus",
     "UserRole",
 ]
@@ -9,6 +9,20 @@ class Category(db.Model):
     name = db.Column(db.String(100), nullable=False, unique=True)
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped by any change, including re-parenting and path rebuilds, so the
+    # category ETags change with the tree
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    parent_id = db.Column(db.Integer, db.ForeignKey("categories.id"), index=True)
+    # Materialized path of ids from the root, e.g. "/1/4/9/" for 9 under 4 under 1.
+    # Every descendant's path starts with its ancestor's, so a subtree is one
+    # range scan on idx_categories_path.
+    path = db.Column(db.String(255))
+
+    __table_args__ = (
+        db.Index("idx_categories_path", "path"),
+        # MAX(updated_at) probe behind the category list ETag
+        db.Index("idx_categories_updated_at", "updated_at"),
+    )
 
     # Relationships
     # allow query all products in a category
@@ -17,10 +31,22 @@ class Category(db.Model):
     # Example:
     # meat = Category.query(1) -> get category with id 1 (meat)
     # meat_products = meat.products
+    def assign_path(self, parent_path=None):
+        """Set path from the parent's path; the row must already have an id"""
+        self.path = f"{parent_path or '/'}{self.id}/"
+
+    @staticmethod
+    def subtree_bounds(path):
+        """(lower, upper) so that lower <= descendant.path < upper"""
+        return path, path[:-1] + chr(ord("/") + 1)
+
     def serialize(self):
         return {
             "id": self.id,
             "name": self.name,
             "description": self.description,
+            "parent_id": self.parent_id,
+            "path": self.path,
             "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
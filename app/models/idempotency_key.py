@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class IdempotencyKey(db.Model):
+    """
+    Stored outcome of a write request sent with an Idempotency-Key header.
+
+    A row with status_code NULL is in flight; once the request succeeds the
+    serialized response is kept until expires_at so retries can be replayed.
+    committed_at is set in the same transaction as the view's first commit:
+    an in-flight row that has it must never be executed again.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Endpoint the key was used on, so the same key may be reused elsewhere
+    scope = db.Column(db.String(100), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    # SHA-256 of method, path and body; a replay must match it
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.SmallInteger)
+    response_body = db.Column(db.Text)
+    locked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    committed_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("scope", "key", name="uk_idempotency_scope_key"),
+        db.Index("idx_idempotency_expires_at", "expires_at"),
+    )
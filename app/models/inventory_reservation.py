@@ -0,0 +1,49 @@
+from datetime import datetime
+from enum import Enum
+
+from app.extensions import db
+
+
+class ReservationStatus(Enum):
+    ACTIVE = "ACTIVE"
+    CONFIRMED = "CONFIRMED"
+    RELEASED = "RELEASED"
+    EXPIRED = "EXPIRED"
+
+
+class InventoryReservation(db.Model):
+    """A temporary hold on stock between cart and payment"""
+
+    __tablename__ = "inventory_reservations"
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(
+        db.Integer, db.ForeignKey("products.id", ondelete="CASCADE"), nullable=False
+    )
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id", ondelete="SET NULL"))
+    quantity = db.Column(db.Integer, nullable=False)
+    status = db.Column(
+        db.Enum(ReservationStatus), nullable=False, default=ReservationStatus.ACTIVE
+    )
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Active holds of one product (expired-hold cleanup before reserving)
+        db.Index("idx_reservations_product_status_expires", "product_id", "status", "expires_at"),
+        # Sweeper: oldest expired active holds first
+        db.Index("idx_reservations_status_expires", "status", "expires_at"),
+    )
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "product_id": self.product_id,
+            "order_id": self.order_id,
+            "quantity": self.quantity,
+            "status": self.status.value if self.status else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
@@ -26,6 +26,11 @@ class Order(db.Model):
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
     shipping_method = db.Column(db.String(50))
 
+    __table_args__ = (
+        # Per-user order history, keyset-paginated by (order_date, id)
+        db.Index("idx_orders_user_order_date", "user_id", "order_date", "id"),
+    )
+
     # Relationship
     order_items = db.relationship(
         "OrderItem", backref="order", lazy=True, cascade="all, delete-orphan"
@@ -0,0 +1,54 @@
+from datetime import datetime
+from enum import Enum
+
+from app.extensions import db
+
+
+class OutboxStatus(Enum):
+    PENDING = "PENDING"
+    DELIVERED = "DELIVERED"
+    FAILED = "FAILED"
+
+
+class OutboxEvent(db.Model):
+    """
+    Side effect of a committed write, queued for the background worker.
+
+    Rows are inserted in the same transaction as the Order/Payment they
+    describe, so an event exists if and only if its write was committed.
+    """
+
+    __tablename__ = "outbox_events"
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(100), nullable=False)
+    aggregate_type = db.Column(db.String(50), nullable=False)
+    aggregate_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.Enum(OutboxStatus), nullable=False, default=OutboxStatus.PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # Next time a worker may pick the event up (retry backoff / claim lease)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    delivered_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Worker poll: due pending events in insertion order
+        db.Index("idx_outbox_status_available", "status", "available_at", "id"),
+    )
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "event_type": self.event_type,
+            "aggregate_type": self.aggregate_type,
+            "aggregate_id": self.aggregate_id,
+            "payload": self.payload,
+            "status": self.status.value if self.status else None,
+            "attempts": self.attempts,
+            "available_at": self.available_at.isoformat() if self.available_at else None,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "delivered_at": self.delivered_at.isoformat() if self.delivered_at else None,
+        }
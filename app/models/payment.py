@@ -23,6 +23,11 @@ class Payment(db.Model):
     )
     payment_date = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Gateway settlement reconciliation looks payments up by transaction id
+        db.Index("idx_payments_transaction_id", "transaction_id"),
+    )
+
     def serialize(self):
         return {
             "id": self.id,
@@ -0,0 +1,96 @@
+from datetime import datetime
+from enum import Enum
+
+from app.extensions import db
+
+
+class ReconciliationStatus(Enum):
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+class PaymentReconciliation(db.Model):
+    """
+    One pass of a gateway settlement file over payments.
+
+    lines_processed is committed together with each chunk's corrections and
+    mismatch rows, so an interrupted run resumes right after its last chunk.
+    """
+
+    __tablename__ = "payment_reconciliations"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False)
+    status = db.Column(
+        db.Enum(ReconciliationStatus), nullable=False, default=ReconciliationStatus.RUNNING
+    )
+    apply_fixes = db.Column(db.Boolean, nullable=False, default=False)
+    lines_processed = db.Column(db.Integer, nullable=False, default=0)
+    matched = db.Column(db.Integer, nullable=False, default=0)
+    missing = db.Column(db.Integer, nullable=False, default=0)
+    amount_mismatches = db.Column(db.Integer, nullable=False, default=0)
+    status_mismatches = db.Column(db.Integer, nullable=False, default=0)
+    corrected = db.Column(db.Integer, nullable=False, default=0)
+    invalid = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status.value if self.status else None,
+            "apply_fixes": self.apply_fixes,
+            "lines_processed": self.lines_processed,
+            "matched": self.matched,
+            "missing": self.missing,
+            "amount_mismatches": self.amount_mismatches,
+            "status_mismatches": self.status_mismatches,
+            "corrected": self.corrected,
+            "invalid": self.invalid,
+            "error": self.error,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class ReconciliationMismatch(db.Model):
+    """A settlement line that did not match its payment"""
+
+    __tablename__ = "payment_reconciliation_mismatches"
+
+    id = db.Column(db.Integer, primary_key=True)
+    reconciliation_id = db.Column(
+        db.Integer,
+        db.ForeignKey("payment_reconciliations.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    line = db.Column(db.Integer, nullable=False)
+    transaction_id = db.Column(db.String(255))
+    # missing, amount, status or invalid
+    kind = db.Column(db.String(20), nullable=False)
+    payment_id = db.Column(db.Integer)
+    expected = db.Column(db.String(255))
+    actual = db.Column(db.String(255))
+    corrected = db.Column(db.Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        db.Index("idx_reconciliation_mismatches_run", "reconciliation_id", "id"),
+    )
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "reconciliation_id": self.reconciliation_id,
+            "line": self.line,
+            "transaction_id": self.transaction_id,
+            "kind": self.kind,
+            "payment_id": self.payment_id,
+            "expected": self.expected,
+            "actual": self.actual,
+            "corrected": self.corrected,
+        }
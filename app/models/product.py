@@ -1,4 +1,7 @@
 from datetime import datetime
+
+from sqlalchemy import DDL, event
+
 from app.extensions import db
 
 
@@ -12,12 +15,33 @@ class Product(db.Model):
     price = db.Column(db.Numeric(10, 2), nullable=False)
     sku = db.Column(db.String(100), nullable=False, unique=True, index=True)
     stock_quantity = db.Column(db.Integer, nullable=False, default=0)
+    # Units held by active inventory reservations; available = stock - reserved
+    reserved_quantity = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     image_url = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
+    # Composite keys used by keyset pagination on GET /products
+    __table_args__ = (
+        db.Index("idx_products_created_at_id", "created_at", "id"),
+        db.Index("idx_products_price_id", "price", "id"),
+        # Storefront filters and facet aggregates
+        db.Index("idx_products_category_price", "category_id", "price"),
+        db.Index("idx_products_category_created_at", "category_id", "created_at", "id"),
+        db.Index("idx_products_stock_quantity", "stock_quantity"),
+        # MAX(updated_at) probe behind the listing ETag
+        db.Index("idx_products_updated_at", "updated_at"),
+        # MySQL full-text index for GET /products/search (SQLite uses FTS5 below)
+        db.Index(
+            "ft_products_name_description",
+            "name",
+            "description",
+            mysql_prefix="FULLTEXT",
+        ).ddl_if(dialect="mysql"),
+    )
+
     # Relationship
     order_items = db.relationship("OrderItem", backref="product", lazy=True)
     # One to many relationship
@@ -39,3 +63,47 @@ class Product(db.Model):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
+
+
+# SQLite full-text search: an external-content FTS5 table over products, kept
+# in sync by triggers so every write path (ORM or raw SQL) updates the index
+# in the same transaction as the row itself.
+PRODUCT_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+for _statement in PRODUCT_FTS_DDL:
+    event.listen(
+        Product.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite")
+    )
+event.listen(
+    Product.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite"),
+)
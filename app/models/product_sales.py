@@ -0,0 +1,30 @@
+from app.extensions import db
+
+
+class ProductSalesDaily(db.Model):
+    """Units and revenue per product per day, maintained from order items"""
+
+    __tablename__ = "product_sales_daily"
+
+    product_id = db.Column(
+        db.Integer, db.ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    day = db.Column(db.Date, primary_key=True)
+    # Category at the time of sale, so per-category rankings never join products
+    category_id = db.Column(db.Integer, nullable=False)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("idx_product_sales_day", "day", "product_id"),
+        db.Index("idx_product_sales_category_day", "category_id", "day"),
+    )
+
+    def serialize(self):
+        return {
+            "product_id": self.product_id,
+            "day": self.day.isoformat() if self.day else None,
+            "category_id": self.category_id,
+            "units": self.units,
+            "revenue": self.revenue,
+        }
@@ -0,0 +1,46 @@
+from app.extensions import db
+
+
+class RevenueDaily(db.Model):
+    """Orders, gross revenue and refunds per day, maintained from Order/Payment writes"""
+
+    __tablename__ = "revenue_daily"
+
+    day = db.Column(db.Date, primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    gross_revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    refund_count = db.Column(db.Integer, nullable=False, default=0)
+    refunded_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+
+class RevenueHourly(db.Model):
+    """Same measures as RevenueDaily per hour (bucket = start of the hour, UTC)"""
+
+    __tablename__ = "revenue_hourly"
+
+    hour = db.Column(db.DateTime, primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    gross_revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    refund_count = db.Column(db.Integer, nullable=False, default=0)
+    refunded_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+
+class RevenueDelta(db.Model):
+    """
+    Signed change to the revenue rollups for one hour bucket.
+
+    Writes only ever INSERT here, so concurrent orders never wait on the
+    shared revenue_daily / revenue_hourly rows; RevenueFolder moves the
+    rows into the rollups out of band and deletes them.
+    """
+
+    __tablename__ = "revenue_deltas"
+
+    id = db.Column(db.Integer, primary_key=True)
+    hour = db.Column(db.DateTime, nullable=False)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    gross_revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    refund_count = db.Column(db.Integer, nullable=False, default=0)
+    refunded_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (db.Index("idx_revenue_deltas_hour", "hour"),)
@@ -1,13 +1,16 @@
 from datetime import datetime
 
-from flask import jsonify
+from flask import Response, current_app, jsonify, stream_with_context
+
+# Flush the streamed body to the socket roughly every 64KB
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class APIResponse:
     """Standardized API response format"""
 
     @staticmethod
-    def success(data=None, message="Success", status_code=200):
+    def success(data=None, message="Success", status_code=200, meta=None):
         """Return a successful API response"""
         response = {
             "success": True,
@@ -15,10 +18,12 @@ class APIResponse:
             "data": data,
             "timestamp": datetime.utcnow().isoformat(),
         }
+        if meta is not None:
+            response["meta"] = meta
         return jsonify(response), status_code
 
     @staticmethod
-    def error(message="An error occurred", status_code=400, error_code=None):
+    def error(message="An error occurred", status_code=400, error_code=None, details=None):
         """Return an error API response"""
         response = {
             "success": False,
@@ -26,4 +31,77 @@ class APIResponse:
             "error_code": error_code,
             "timestamp": datetime.utcnow().isoformat(),
         }
+        if details is not None:
+            response["details"] = details
         return jsonify(response), status_code
+
+    @staticmethod
+    def _stream_response(items, message):
+        """Write serialized `items` into the success() envelope as they come"""
+        dumps = current_app.json.dumps
+        head = dumps(
+            {
+                "success": True,
+                "message": message,
+                "timestamp": datetime.utcnow().isoformat(),
+            }
+        )
+
+        def generate():
+            buffer = [head[:-1], ',"data":[']
+            size = 0
+            first = True
+            for item in items:
+                chunk = dumps(item)
+                if not first:
+                    chunk = "," + chunk
+                first = False
+                buffer.append(chunk)
+                size += len(chunk)
+                if size >= STREAM_CHUNK_SIZE:
+                    yield "".join(buffer)
+                    buffer = []
+                    size = 0
+            buffer.append("]}")
+            yield "".join(buffer)
+
+        return Response(stream_with_context(generate()), status=200, mimetype="application/json")
+
+    @staticmethod
+    def stream(query, message="Success", serializer=None, yield_per=1000):
+        """
+        Stream a list response for `query` without materializing it.
+
+        Rows are fetched `yield_per` at a time through a server-side cursor
+        and written into the same envelope as success(), so peak memory is
+        one fetch batch instead of the whole result set. The serializer must
+        not query: on MySQL the open cursor cannot share its connection, so
+        use stream_batches() for eager loads or per-row aggregates.
+        """
+        serializer = serializer or (lambda item: item.serialize())
+        items = (serializer(item) for item in query.yield_per(yield_per))
+        return APIResponse._stream_response(items, message)
+
+    @staticmethod
+    def stream_batches(query, id_column, serialize_batch, message="Success", batch_size=1000):
+        """
+        Stream `query` in id order, `batch_size` rows per keyset query.
+
+        Each batch is read in full before `serialize_batch(rows)` runs, so
+        it may issue its own queries (eager loads, aggregates for the batch)
+        without interleaving with an open server-side cursor.
+        """
+
+        def items():
+            last_id = None
+            while True:
+                batch_query = query.order_by(id_column)
+                if last_id is not None:
+                    batch_query = batch_query.filter(id_column > last_id)
+                rows = batch_query.limit(batch_size).all()
+                yield from serialize_batch(rows)
+                if len(rows) < batch_size:
+                    return
+                last_id = getattr(rows[-1], id_column.key)
+
+        return APIResponse._stream_response(items(), message)
@@ -0,0 +1,313 @@
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+
+from flask import current_app
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.product_sales import ProductSalesDaily
+
+_PENDING_KEY = "autocomplete_pending"
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse punctuation to single spaces"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def _index_keys(name):
+    """One key per word start, so "air m" matches "MacBook Air M2" """
+    words = normalize(name).split()
+    return [" ".join(words[start:]) for start in range(len(words))]
+
+
+class ProductAutocomplete:
+    """
+    In-memory prefix index of product names for search-as-you-type.
+
+    Keys are kept in one sorted list (parallel to a list of product ids), so
+    a lookup is a binary search plus a short forward scan. Products committed
+    through the ORM are applied incrementally; everything else (bulk imports,
+    other worker processes, popularity changes) is picked up by a full
+    reload every `refresh_seconds`. Reloads run on a background thread and
+    swap the new index in under the lock, so lookups keep serving the old
+    one meanwhile; only the very first lookup waits for a build. Changes
+    applied while a build runs are logged and replayed onto the new index
+    before it is swapped in, so the swap never drops them.
+    """
+
+    def __init__(self, refresh_seconds=300, scan_limit=5000):
+        self.refresh_seconds = refresh_seconds
+        self.scan_limit = scan_limit
+        self._lock = threading.RLock()
+        self._keys = []
+        self._ids = []
+        self._names = {}
+        self._keys_by_id = {}
+        self._scores = {}
+        self._loaded_at = None
+        self._refreshing = False
+        self._listening = False
+        self._load_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        # Changes applied during a build, replayed onto its result (None: no build)
+        self._changes = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        self.refresh_seconds = app.config["AUTOCOMPLETE_REFRESH_SECONDS"]
+        self.scan_limit = app.config["AUTOCOMPLETE_SCAN_LIMIT"]
+        self.listen()
+
+    def start(self, app):
+        if self._thread is not None or self.refresh_seconds <= 0:
+            return
+        self._thread = threading.Thread(
+            target=self._run, args=(app,), name="autocomplete-refresh", daemon=True
+        )
+        self._thread.start()
+
+    def _seconds_until_stale(self):
+        with self._lock:
+            if self._loaded_at is None:
+                return 0
+            return max(0, self.refresh_seconds - (time.monotonic() - self._loaded_at))
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self, app):
+        while not self._stop.is_set():
+            self._wake.wait(self._seconds_until_stale())
+            self._wake.clear()
+            if not self._stop.is_set() and not self._refresh_in(app):
+                # Keep serving the old index; don't spin while the database is down
+                self._stop.wait(self.refresh_seconds)
+
+    def _refresh_in(self, app):
+        with app.app_context():
+            try:
+                self.refresh()
+                return True
+            except Exception:
+                app.logger.exception("Autocomplete refresh failed")
+                return False
+            finally:
+                db.session.remove()
+                with self._lock:
+                    self._refreshing = False
+
+    def _build(self):
+        scores = dict(
+            db.session.query(ProductSalesDaily.product_id, func.sum(ProductSalesDaily.units))
+            .group_by(ProductSalesDaily.product_id)
+            .all()
+        )
+        pairs = []
+        names = {}
+        keys_by_id = {}
+        for product_id, name in db.session.query(Product.id, Product.name).yield_per(5000):
+            names[product_id] = name
+            keys = _index_keys(name)
+            keys_by_id[product_id] = keys
+            pairs.extend((key, product_id) for key in keys)
+        pairs.sort()
+
+        return (
+            [key for key, _ in pairs],
+            [product_id for _, product_id in pairs],
+            names,
+            keys_by_id,
+            {product_id: int(units or 0) for product_id, units in scores.items()},
+        )
+
+    def refresh(self):
+        """Rebuild the whole index from the database and swap it in"""
+        with self._build_lock:
+            with self._lock:
+                self._changes = []
+            try:
+                keys, ids, names, keys_by_id, scores = self._build()
+            except Exception:
+                with self._lock:
+                    self._changes = None
+                raise
+            with self._lock:
+                self._keys, self._ids = keys, ids
+                self._names, self._keys_by_id, self._scores = names, keys_by_id, scores
+                # A change committed just before the build read the database
+                # is applied twice: harmless for names, and a popularity
+                # overcount lasts only until the next reload
+                for action, product_id, value in self._changes:
+                    self._apply(action, product_id, value)
+                self._changes = None
+                self._loaded_at = time.monotonic()
+
+    def mark_stale(self):
+        """Reload in the background now (e.g. after a bulk import)"""
+        with self._lock:
+            if self._loaded_at is not None:
+                self._loaded_at = 0
+        self._wake.set()
+
+    def _ensure_fresh(self):
+        with self._lock:
+            loaded_at = self._loaded_at
+        if loaded_at is None:
+            # Nothing to serve yet: the first lookup builds, concurrent ones wait for it
+            with self._load_lock:
+                if self._loaded_at is None:
+                    self.refresh()
+            return
+        if time.monotonic() - loaded_at < self.refresh_seconds:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            self._wake.set()
+            return
+        # No refresher thread (CLI, tests): one-off background rebuild
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(
+            target=self._refresh_in,
+            args=(current_app._get_current_object(),),
+            name="autocomplete-refresh-once",
+            daemon=True,
+        ).start()
+
+    def _remove(self, product_id):
+        for key in self._keys_by_id.pop(product_id, ()):
+            index = bisect_left(self._keys, key)
+            while index < len(self._keys) and self._keys[index] == key:
+                if self._ids[index] == product_id:
+                    del self._keys[index]
+                    del self._ids[index]
+                    break
+                index += 1
+        self._names.pop(product_id, None)
+
+    def _upsert(self, product_id, name):
+        self._remove(product_id)
+        self._names[product_id] = name
+        keys = _index_keys(name)
+        self._keys_by_id[product_id] = keys
+        for key in keys:
+            index = bisect_left(self._keys, key)
+            while index < len(self._keys) and self._keys[index] == key and self._ids[index] < product_id:
+                index += 1
+            self._keys.insert(index, key)
+            self._ids.insert(index, product_id)
+
+    def _apply(self, action, product_id, value):
+        if action == "upsert":
+            self._upsert(product_id, value)
+        elif action == "remove":
+            self._remove(product_id)
+        else:
+            self._scores[product_id] = self._scores.get(product_id, 0) + value
+
+    def _change(self, action, product_id, value=None):
+        with self._lock:
+            if self._changes is not None:
+                self._changes.append((action, product_id, value))
+            if self._loaded_at is not None:
+                self._apply(action, product_id, value)
+
+    def upsert(self, product_id, name):
+        self._change("upsert", product_id, name)
+
+    def remove(self, product_id):
+        self._change("remove", product_id)
+
+    def add_popularity(self, product_id, units):
+        self._change("sold", product_id, units)
+
+    def lookup(self, prefix, limit=10):
+        """Top `limit` products whose name has a word starting with prefix"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        self._ensure_fresh()
+
+        with self._lock:
+            start = bisect_left(self._keys, prefix)
+            candidates = {}
+            for index in range(start, min(start + self.scan_limit, len(self._keys))):
+                if not self._keys[index].startswith(prefix):
+                    break
+                product_id = self._ids[index]
+                candidates[product_id] = self._names[product_id]
+
+            best = heapq.nsmallest(
+                limit,
+                candidates.items(),
+                key=lambda item: (-self._scores.get(item[0], 0), len(item[1]), item[0]),
+            )
+            return [
+                {"id": product_id, "name": name, "score": self._scores.get(product_id, 0)}
+                for product_id, name in best
+            ]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "products": len(self._names),
+                "refresher_running": self._thread is not None and self._thread.is_alive(),
+                "keys": len(self._keys),
+                "age_seconds": (
+                    round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None
+                ),
+            }
+
+    def _collect(self, session, flush_context):
+        pending = session.info.setdefault(_PENDING_KEY, [])
+        for instance in session.new:
+            if isinstance(instance, Product):
+                pending.append(("upsert", instance.id, instance.name))
+            elif isinstance(instance, OrderItem):
+                pending.append(("sold", instance.product_id, instance.quantity))
+        for instance in session.dirty:
+            if isinstance(instance, Product) and session.is_modified(instance):
+                pending.append(("upsert", instance.id, instance.name))
+        for instance in session.deleted:
+            if isinstance(instance, Product):
+                pending.append(("remove", instance.id, None))
+
+    def _apply_pending(self, session):
+        for action, product_id, value in session.info.pop(_PENDING_KEY, ()):
+            if action == "upsert":
+                self.upsert(product_id, value)
+            elif action == "remove":
+                self.remove(product_id)
+            else:
+                self.add_popularity(product_id, int(value or 0))
+
+    def _drop_pending(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop(_PENDING_KEY, None)
+
+    def listen(self):
+        """Hook ORM session events; call once at startup"""
+        if self._listening:
+            return
+        event.listen(Session, "after_flush", self._collect)
+        event.listen(Session, "after_commit", self._apply_pending)
+        event.listen(Session, "after_soft_rollback", self._drop_pending)
+        self._listening = True
+
+
+product_autocomplete = ProductAutocomplete()
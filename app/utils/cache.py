@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_PENDING_KEY = "catalog_cache_pending"
+
+
+class CatalogCache:
+    """
+    Per-process LRU + TTL cache of serialized catalog payloads.
+
+    Entries are keyed by (kind, id), e.g. ("product", 1). Rows flushed through
+    the ORM are invalidated when their transaction commits; the TTL bounds how
+    stale other worker processes (which keep their own cache) can get.
+    """
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        # model class -> function(instance) returning the keys it affects
+        self._watchers = {}
+        self._listening = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        self.maxsize = app.config["CATALOG_CACHE_SIZE"]
+        self.ttl = app.config["CATALOG_CACHE_TTL"]
+        self.clear()
+        self.listen()
+
+    def watch(self, model, keys_for):
+        """Invalidate keys_for(instance) whenever a `model` row is committed"""
+        self._watchers[model] = keys_for
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, generation=None):
+        """
+        Store `value`. When `generation` is given the write is dropped if any
+        invalidation happened since it was read, so a slow loader can never
+        put back a row that a concurrent commit just replaced.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        generation = self._generation
+        value = loader()
+        if value is not None:
+            self.set(key, value, generation)
+        return value
+
+    def get_many_or_load(self, keys, loader):
+        """
+        Return {key: value} for `keys`, resolving every miss with a single
+        loader(missing_keys) call that returns a dict of the keys it found.
+        """
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            generation = self._generation
+            loaded = loader(missing)
+            for key, value in loaded.items():
+                self.set(key, value, generation)
+            found.update(loaded)
+        return found
+
+    def invalidate(self, *keys):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _collect(self, session, flush_context):
+        pending = session.info.setdefault(_PENDING_KEY, set())
+        for instance in (*session.new, *session.dirty, *session.deleted):
+            keys_for = self._watchers.get(type(instance))
+            if keys_for is not None:
+                pending.update(keys_for(instance))
+
+    def _flush_pending(self, session):
+        pending = session.info.pop(_PENDING_KEY, None)
+        if pending:
+            self.invalidate(*pending)
+
+    def _drop_pending(self, session, previous_transaction):
+        # Only the outermost rollback discards the changes; a savepoint
+        # rollback keeps the keys collected by earlier flushes.
+        if previous_transaction.parent is None:
+            session.info.pop(_PENDING_KEY, None)
+
+    def listen(self):
+        """Hook ORM session events; call once at startup"""
+        if self._listening:
+            return
+        event.listen(Session, "after_flush", self._collect)
+        event.listen(Session, "after_commit", self._flush_pending)
+        event.listen(Session, "after_soft_rollback", self._drop_pending)
+        self._listening = True
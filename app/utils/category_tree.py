@@ -0,0 +1,70 @@
+from sqlalchemy import bindparam, update
+
+from app.extensions import catalog_cache, db
+from app.models.category import Category
+
+
+def build_category_tree():
+    """
+    Nested [{id, name, path, children: [...]}] for every category.
+
+    Ordering by path yields parents before children, so one query and one
+    pass are enough.
+    """
+    rows = (
+        db.session.query(Category.id, Category.name, Category.parent_id, Category.path)
+        .order_by(Category.path, Category.id)
+        .all()
+    )
+    nodes = {}
+    roots = []
+    for category_id, name, parent_id, path in rows:
+        nodes[category_id] = {"id": category_id, "name": name, "path": path, "children": []}
+    for category_id, name, parent_id, path in rows:
+        parent = nodes.get(parent_id)
+        (parent["children"] if parent else roots).append(nodes[category_id])
+    return roots
+
+
+def rebuild_category_paths():
+    """
+    Recompute every materialized path from parent_id (backfill/repair).
+
+    Only rows whose path actually changes are written, so their updated_at
+    (and with it the category ETags) moves only when the tree did.
+    """
+    rows = db.session.query(Category.id, Category.parent_id, Category.path).all()
+    current = {category_id: path for category_id, _, path in rows}
+    children = {}
+    for category_id, parent_id, _ in rows:
+        children.setdefault(parent_id, []).append(category_id)
+
+    paths = {}
+    stack = [(category_id, "/") for category_id in children.get(None, [])]
+    while stack:
+        category_id, parent_path = stack.pop()
+        path = f"{parent_path}{category_id}/"
+        paths[category_id] = path
+        stack.extend((child, path) for child in children.get(category_id, []))
+
+    orphans = [category_id for category_id, _, _ in rows if category_id not in paths]
+    if orphans:
+        raise ValueError(f"Categories with a parent cycle or missing parent: {orphans}")
+
+    changed = {
+        category_id: path for category_id, path in paths.items() if current[category_id] != path
+    }
+    table = Category.__table__
+    if changed:
+        # Core UPDATE still applies the updated_at onupdate default
+        db.session.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(path=bindparam("b_path")),
+            [{"b_id": category_id, "b_path": path} for category_id, path in changed.items()],
+        )
+    db.session.commit()
+    catalog_cache.invalidate(
+        ("category_tree",), *(("category", category_id) for category_id in changed)
+    )
+    return len(paths)
@@ -0,0 +1,194 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import case, update
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import catalog_cache, db
+from app.models.address import Address
+from app.models.order import Order, OrderStatus
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.utils.sales import record_sales
+
+
+class CheckoutError(Exception):
+    """Checkout rejected; carries the HTTP status and optional per-line details"""
+
+    def __init__(self, message, status_code=400, details=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.details = details
+
+
+def merge_lines(items):
+    """Validate cart lines and sum duplicates (order_items is unique per product)"""
+    if not isinstance(items, list) or not items:
+        raise CheckoutError("items must be a non-empty list")
+
+    quantities = {}
+    for line in items:
+        try:
+            product_id = int(line["product_id"])
+            quantity = int(line["quantity"])
+        except (KeyError, TypeError, ValueError):
+            raise CheckoutError("Each item needs an integer product_id and quantity")
+        if quantity < 1:
+            raise CheckoutError(f"quantity for product {product_id} must be at least 1")
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def _decrement_stock(quantities):
+    """
+    Take stock for every line with one conditional UPDATE.
+
+    Rows are only touched when enough unreserved stock is left (units held
+    by other buyers' reservations are not for sale), so the statement can
+    never oversell; the number of matched rows tells whether every line got
+    its quantity. Locking all rows in a single statement (primary-key order)
+    means two checkouts can never deadlock on each other.
+    """
+    table = Product.__table__
+    wanted = case(
+        *((table.c.id == product_id, quantity) for product_id, quantity in quantities.items()),
+        else_=0,
+    )
+    result = db.session.execute(
+        update(table)
+        .where(
+            table.c.id.in_(list(quantities)),
+            table.c.stock_quantity - table.c.reserved_quantity >= wanted,
+        )
+        .values(stock_quantity=table.c.stock_quantity - wanted, updated_at=datetime.utcnow())
+    )
+    return result.rowcount == len(quantities)
+
+
+def shortages(quantities):
+    """Lines of `quantities` that unreserved stock cannot cover"""
+    rows = db.session.query(
+        Product.id, Product.stock_quantity - Product.reserved_quantity
+    ).filter(Product.id.in_(list(quantities)))
+    return [
+        {"product_id": product_id, "requested": quantities[product_id], "available": available}
+        for product_id, available in rows
+        if available < quantities[product_id]
+    ]
+
+
+def _place_order(user_id, shipping_address_id, shipping_method, quantities, reservation_ids=()):
+    # Imported here: reservations builds on CheckoutError and merge_lines
+    from app.utils.reservations import _expire_for_products, sell_reservations
+
+    address_owner = (
+        db.session.query(Address.user_id).filter(Address.id == shipping_address_id).scalar()
+    )
+    if address_owner is None or address_owner != user_id:
+        raise CheckoutError("Shipping address not found for this user")
+
+    products = {
+        product_id: (price, category_id)
+        for product_id, price, category_id in db.session.query(
+            Product.id, Product.price, Product.category_id
+        ).filter(Product.id.in_(list(quantities)))
+    }
+    missing = sorted(set(quantities) - set(products))
+    if missing:
+        raise CheckoutError("Unknown products", details={"missing": missing})
+
+    now = datetime.utcnow()
+    order = Order(
+        user_id=user_id,
+        shipping_address_id=shipping_address_id,
+        order_date=now,
+        status=OrderStatus.PENDING,
+        total_amount=sum(
+            (products[product_id][0] * quantity for product_id, quantity in quantities.items()),
+            Decimal("0"),
+        ),
+        shipping_method=shipping_method,
+    )
+    db.session.add(order)
+    db.session.flush()
+
+    items = [
+        OrderItem(
+            order_id=order.id,
+            product_id=product_id,
+            quantity=quantity,
+            price_per_unit=products[product_id][0],
+        )
+        for product_id, quantity in sorted(quantities.items())
+    ]
+    db.session.add_all(items)
+    db.session.flush()
+
+    # Hot rows are locked as late as possible, so the locks are held only
+    # for these statements and the commit right after them: first the
+    # products (the stock check can still reject the order), then the
+    # (product, day) sales rollup rows, both in product id order. Lapsed
+    # holds are released first so their units are for sale again, as the
+    # availability endpoint already reports them.
+    _expire_for_products(list(quantities), now)
+    unreserved = quantities
+    if reservation_ids:
+        unreserved = sell_reservations(reservation_ids, quantities, order.id, now)
+    if unreserved and not _decrement_stock(unreserved):
+        raise CheckoutError(
+            "Insufficient stock", status_code=409, details={"shortages": shortages(unreserved)}
+        )
+    record_sales(
+        [
+            (item.product_id, products[item.product_id][1], item.quantity, item.price_per_unit)
+            for item in items
+        ],
+        sold_at=order.order_date,
+    )
+
+    db.session.commit()
+
+    # Stock was changed with Core, outside the ORM commit hooks
+    catalog_cache.invalidate(
+        *(("product", product_id) for product_id in quantities),
+        *{("category_stats", category_id) for _, category_id in products.values()},
+    )
+    return order, items
+
+
+def checkout(data, retries=2):
+    """
+    Create an order with all its items and take stock in one transaction.
+
+    Prices come from the current catalog, never from the client. Optional
+    `reservation_ids` are the buyer's own active holds: their units are
+    sold from the reservation instead of from unreserved stock. Lock wait
+    timeouts and deadlocks are retried up to `retries` times.
+    """
+    try:
+        user_id = int(data["user_id"])
+        shipping_address_id = int(data["shipping_address_id"])
+    except (KeyError, TypeError, ValueError):
+        raise CheckoutError("user_id and shipping_address_id are required integers")
+    quantities = merge_lines(data.get("items"))
+    reservation_ids = data.get("reservation_ids") or []
+    if not isinstance(reservation_ids, list):
+        raise CheckoutError("reservation_ids must be a list of integers")
+    try:
+        reservation_ids = list(dict.fromkeys(int(reservation_id) for reservation_id in reservation_ids))
+    except (TypeError, ValueError):
+        raise CheckoutError("reservation_ids must be a list of integers")
+
+    for attempt in range(retries + 1):
+        try:
+            return _place_order(
+                user_id, shipping_address_id, data.get("shipping_method"), quantities, reservation_ids
+            )
+        except OperationalError:
+            db.session.rollback()
+            if attempt == retries:
+                raise
+        except Exception:
+            db.session.rollback()
+            raise
@@ -0,0 +1,58 @@
+import hashlib
+from datetime import datetime, timezone
+
+from flask import make_response, request
+
+
+def make_etag(*parts):
+    """Strong ETag value derived from the given version parts"""
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def query_fingerprint():
+    """Stable representation of the query string for list ETags"""
+    return "&".join(f"{key}={value}" for key, value in sorted(request.args.items(multi=True)))
+
+
+def _as_http_date(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def _is_fresh(etag, last_modified):
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional(etag, last_modified, build):
+    """
+    Answer 304 Not Modified when the client already holds this version,
+    otherwise call build() (an APIResponse tuple) and attach the validators.
+
+    build() is only invoked on a miss, so a revalidation never serializes
+    or sends the body.
+    """
+    last_modified = _as_http_date(last_modified)
+
+    if _is_fresh(etag, last_modified):
+        response = make_response("", 304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,61 @@
+from flask import current_app
+from sqlalchemy import and_, case, func, literal
+
+from app.extensions import db
+from app.models.product import Product
+
+
+def _price_bucket_expression(bounds):
+    """CASE expression mapping a price to the index of its bucket"""
+    whens = [(Product.price < upper, index) for index, upper in enumerate(bounds[1:])]
+    return case(*whens, else_=len(bounds) - 1)
+
+
+def _bucket_ranges(bounds):
+    ranges = []
+    for index, lower in enumerate(bounds):
+        upper = bounds[index + 1] if index + 1 < len(bounds) else None
+        ranges.append({"min": lower, "max": upper})
+    return ranges
+
+
+def product_facets(base_filters, category_id=None, price_filters=()):
+    """
+    Category and price-bucket counts for the product listing.
+
+    Each facet ignores its own filter (so the storefront can still show the
+    other categories / price ranges) but honours every other one. Both are
+    derived from a single GROUP BY (category_id, bucket, in_price_range)
+    query, which is at most categories x buckets x 2 rows.
+    """
+    bounds = current_app.config["PRICE_FACET_BUCKETS"]
+    bucket = _price_bucket_expression(bounds).label("bucket")
+    in_price_range = (
+        case((and_(*price_filters), 1), else_=0) if price_filters else literal(1)
+    ).label("in_price_range")
+
+    rows = (
+        db.session.query(Product.category_id, bucket, in_price_range, func.count(Product.id))
+        .filter(*base_filters)
+        .group_by(Product.category_id, bucket, in_price_range)
+        .all()
+    )
+
+    category_counts = {}
+    bucket_counts = [0] * len(bounds)
+    for row_category_id, row_bucket, row_in_range, count in rows:
+        if row_in_range:
+            category_counts[row_category_id] = category_counts.get(row_category_id, 0) + count
+        if category_id is None or row_category_id == category_id:
+            bucket_counts[int(row_bucket)] += count
+
+    return {
+        "categories": [
+            {"category_id": key, "count": category_counts[key]}
+            for key in sorted(category_counts)
+        ],
+        "price": [
+            dict(price_range, count=count)
+            for price_range, count in zip(_bucket_ranges(bounds), bucket_counts)
+        ],
+    }
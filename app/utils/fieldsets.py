@@ -0,0 +1,82 @@
+from datetime import datetime
+from enum import Enum
+
+from flask import request
+from sqlalchemy.orm import load_only
+
+from app.utils.query_params import QueryParamError
+
+
+def parse_fields(model, hidden=()):
+    """
+    Read ?fields=a,b,c for `model`.
+
+    Returns the requested column names in request order, or None when the
+    client wants the full representation. Columns in `hidden` (e.g. password
+    hashes) can never be selected.
+    """
+    raw = request.args.get("fields")
+    if not raw:
+        return None
+
+    allowed = {attr.key for attr in model.__mapper__.column_attrs} - set(hidden)
+    fields = list(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise QueryParamError(f"Unknown fields: {', '.join(unknown)}")
+    if not fields:
+        raise QueryParamError("fields must list at least one column")
+    return fields
+
+
+def parse_includes(allowed):
+    """
+    Read ?include=a,b.c against the `allowed` relationship paths.
+
+    A nested path implies its parents, so "items.product" also includes
+    "items". Returns a set of paths (empty when nothing was requested).
+    """
+    raw = request.args.get("include")
+    if not raw:
+        return set()
+
+    includes = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = sorted(includes - set(allowed))
+    if unknown:
+        raise QueryParamError(f"Unknown include: {', '.join(unknown)}")
+    for path in list(includes):
+        parts = path.split(".")
+        includes.update(".".join(parts[:depth]) for depth in range(1, len(parts)))
+    return includes
+
+
+def load_only_fields(query, model, fields, *extra_columns):
+    """Restrict the SELECT list to `fields` (plus extras such as sort keys)"""
+    columns = [getattr(model, name) for name in fields]
+    columns.extend(column for column in extra_columns if column.key not in fields)
+    return query.options(load_only(*columns))
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def serialize_fields(instance, fields):
+    """Serialize only `fields`, matching the formatting of Model.serialize()"""
+    return {name: _plain(getattr(instance, name)) for name in fields}
+
+
+def project(payload, fields):
+    """Trim an already serialized payload down to `fields`"""
+    return {name: payload.get(name) for name in fields}
+
+
+def serializer_for(fields):
+    """Row serializer for a list response: full serialize() or a fieldset"""
+    if fields is None:
+        return lambda instance: instance.serialize()
+    return lambda instance: serialize_fields(instance, fields)
@@ -0,0 +1,244 @@
+import hashlib
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import Response, current_app, make_response, request
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.idempotency_key import IdempotencyKey
+from app.utils.api_helpers import APIResponse
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+_POLL_SECONDS = 0.1
+# session.info key holding the id of the key row the running view owns
+_IN_FLIGHT = "idempotency_key_id"
+
+
+def _fingerprint():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(request.path.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _claim(scope, key, fingerprint):
+    """
+    Insert the in-flight row for (scope, key).
+
+    Returns (owned, row): owned is True when this request now holds the
+    key, otherwise row is the one another request stored. Expired rows are
+    taken over, and so are in-flight rows abandoned for longer than
+    IDEMPOTENCY_LOCK_TIMEOUT (the worker died mid-request), but only if
+    their view never committed: re-running it could write twice.
+    """
+    now = datetime.utcnow()
+    ttl = current_app.config["IDEMPOTENCY_TTL_SECONDS"]
+    lock_timeout = timedelta(seconds=current_app.config["IDEMPOTENCY_LOCK_TIMEOUT"])
+
+    record = IdempotencyKey(
+        scope=scope,
+        key=key,
+        fingerprint=fingerprint,
+        locked_at=now,
+        expires_at=now + timedelta(seconds=ttl),
+    )
+    db.session.add(record)
+    try:
+        db.session.commit()
+        return True, record
+    except IntegrityError:
+        db.session.rollback()
+
+    existing = db.session.execute(
+        select(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+    ).scalar_one_or_none()
+    if existing is None:
+        # Pruned between our INSERT and SELECT: try once more
+        return _claim(scope, key, fingerprint)
+
+    abandoned = (
+        existing.status_code is None
+        and existing.committed_at is None
+        and existing.locked_at <= now - lock_timeout
+    )
+    if existing.expires_at <= now or abandoned:
+        taken = db.session.execute(
+            IdempotencyKey.__table__.update()
+            .where(
+                IdempotencyKey.id == existing.id,
+                IdempotencyKey.locked_at == existing.locked_at,
+            )
+            .values(
+                fingerprint=fingerprint,
+                status_code=None,
+                response_body=None,
+                committed_at=None,
+                locked_at=now,
+                expires_at=now + timedelta(seconds=ttl),
+            )
+        ).rowcount
+        db.session.commit()
+        if taken:
+            return True, existing
+        db.session.refresh(existing)
+    return False, existing
+
+
+def _wait_for(record):
+    """Poll an in-flight key until it completes or IDEMPOTENCY_WAIT_SECONDS pass"""
+    deadline = time.monotonic() + current_app.config["IDEMPOTENCY_WAIT_SECONDS"]
+    record_id = record.id
+    while record is not None and record.status_code is None and time.monotonic() < deadline:
+        time.sleep(_POLL_SECONDS)
+        # End the transaction so each poll reads a fresh snapshot (REPEATABLE READ)
+        db.session.rollback()
+        record = db.session.get(IdempotencyKey, record_id)
+    return record
+
+
+def _stranded(record):
+    """In flight past the lock timeout although its write committed: the worker died"""
+    lock_timeout = timedelta(seconds=current_app.config["IDEMPOTENCY_LOCK_TIMEOUT"])
+    return (
+        record.status_code is None
+        and record.committed_at is not None
+        and record.locked_at <= datetime.utcnow() - lock_timeout
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _mark_committed(session):
+    """Stamp the owned key in the same transaction as the view's first commit"""
+    record_id = session.info.get(_IN_FLIGHT)
+    if record_id is not None:
+        session.execute(
+            update(IdempotencyKey.__table__)
+            .where(IdempotencyKey.id == record_id, IdempotencyKey.committed_at.is_(None))
+            .values(committed_at=datetime.utcnow())
+        )
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.status_code, mimetype="application/json")
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _release(record_id):
+    """
+    Drop the in-flight row of a request that did not succeed, so it can be
+    retried. A row whose view already committed stays: a retry gets 409
+    rather than a second write.
+    """
+    db.session.rollback()
+    db.session.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.id == record_id,
+            IdempotencyKey.status_code.is_(None),
+            IdempotencyKey.committed_at.is_(None),
+        )
+    )
+    db.session.commit()
+
+
+def idempotent(view):
+    """
+    Make a POST endpoint safe to retry with an Idempotency-Key header.
+
+    The first request claims the key with a unique (scope, key) row before
+    the view runs. A retry with the same key and body gets the stored
+    response back without touching the view; a retry that arrives while the
+    first one is still running waits for it (up to IDEMPOTENCY_WAIT_SECONDS)
+    and then gets 409. Only 2xx responses are stored; failures release the
+    key so the client can try again. Requests without the header are not
+    affected.
+
+    The view's first commit also stamps the key row (committed_at), in the
+    same transaction. If the process dies after that but before the
+    response is stored, the key is never run again: retries get 409 and an
+    operator has to resolve the request.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return APIResponse.error(
+                message=f"{HEADER} must be at most {MAX_KEY_LENGTH} characters", status_code=400
+            )
+
+        scope = request.endpoint
+        fingerprint = _fingerprint()
+        owned, record = _claim(scope, key, fingerprint)
+
+        if not owned:
+            if record.fingerprint != fingerprint:
+                return APIResponse.error(
+                    message=f"{HEADER} was already used with a different request",
+                    status_code=422,
+                )
+            if _stranded(record):
+                return APIResponse.error(
+                    message=f"The request with this {HEADER} was applied but its response was lost",
+                    status_code=409,
+                )
+            record = _wait_for(record)
+            if record is None or record.status_code is None:
+                return APIResponse.error(
+                    message=f"A request with this {HEADER} is still in progress",
+                    status_code=409,
+                )
+            return _replay(record)
+
+        record_id = record.id
+        db.session.info[_IN_FLIGHT] = record_id
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            db.session.info.pop(_IN_FLIGHT, None)
+            _release(record_id)
+            raise
+        db.session.info.pop(_IN_FLIGHT, None)
+
+        if 200 <= response.status_code < 300 and not response.is_streamed:
+            db.session.execute(
+                IdempotencyKey.__table__.update()
+                .where(IdempotencyKey.id == record_id)
+                .values(status_code=response.status_code, response_body=response.get_data(as_text=True))
+            )
+            db.session.commit()
+        else:
+            _release(record_id)
+        return response
+
+    return wrapper
+
+
+def prune_idempotency_keys(batch_size=1000):
+    """Delete expired keys `batch_size` rows per commit; returns the number removed"""
+    removed = 0
+    while True:
+        now = datetime.utcnow()
+        ids = db.session.scalars(
+            select(IdempotencyKey.id)
+            .where(IdempotencyKey.expires_at <= now)
+            .order_by(IdempotencyKey.expires_at)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            return removed
+        db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)))
+        db.session.commit()
+        removed += len(ids)
+        if len(ids) < batch_size:
+            return removed
@@ -0,0 +1,158 @@
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import func, select, update
+
+from app.extensions import db
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.utils.autocomplete import product_autocomplete
+from app.utils.checkout import CheckoutError
+from app.utils.revenue import order_total_changed
+from app.utils.rollups import increment_many
+from app.utils.sales import record_sales
+
+
+class OrderItemsError(CheckoutError):
+    """Bulk order item request rejected; same shape as CheckoutError"""
+
+
+def _parse_lines(items, max_lines):
+    """
+    Validate request lines and merge repeated products.
+
+    Returns {product_id: [quantity, price_or_None]}; the first explicit
+    price_per_unit given for a product wins.
+    """
+    if not isinstance(items, list) or not items:
+        raise OrderItemsError("items must be a non-empty list")
+    if len(items) > max_lines:
+        raise OrderItemsError(f"At most {max_lines} items per request")
+
+    lines = {}
+    for line in items:
+        try:
+            product_id = int(line["product_id"])
+            quantity = int(line["quantity"])
+        except (KeyError, TypeError, ValueError):
+            raise OrderItemsError("Each item needs an integer product_id and quantity")
+        if quantity < 1:
+            raise OrderItemsError(f"quantity for product {product_id} must be at least 1")
+
+        price = line.get("price_per_unit")
+        if price is not None:
+            try:
+                price = Decimal(str(price)).quantize(Decimal("0.01"))
+            except InvalidOperation:
+                raise OrderItemsError(f"price_per_unit for product {product_id} must be a number")
+            if not price.is_finite() or price < 0:
+                raise OrderItemsError(f"price_per_unit for product {product_id} must be non-negative")
+
+        merged = lines.setdefault(product_id, [0, None])
+        merged[0] += quantity
+        if merged[1] is None:
+            merged[1] = price
+    return lines
+
+
+def add_order_items(order_id, items, max_lines):
+    """
+    Add many lines to an order in one transaction.
+
+    All lines go in with a single executemany upsert on uk_order_product:
+    a product already on the order has its quantity increased instead of
+    failing the request. Such a line keeps its stored price_per_unit, and
+    a request giving a different price for it is rejected (409). New lines
+    without price_per_unit take the catalog price. Order.total_amount is
+    recomputed from order_item by one UPDATE in the same transaction, and
+    the sales and revenue rollups are updated alongside.
+    Returns (order, items) after commit.
+    """
+    lines = _parse_lines(items, max_lines)
+
+    try:
+        # Lock the order so concurrent additions cannot interleave with the
+        # total recomputation below
+        order = (
+            db.session.query(Order).filter(Order.id == order_id).with_for_update().one_or_none()
+        )
+        if order is None:
+            raise OrderItemsError("Order not found", status_code=404)
+
+        products = {
+            product_id: (price, category_id)
+            for product_id, price, category_id in db.session.query(
+                Product.id, Product.price, Product.category_id
+            ).filter(Product.id.in_(list(lines)))
+        }
+        missing = sorted(set(lines) - set(products))
+        if missing:
+            raise OrderItemsError("Unknown products", details={"missing": missing})
+
+        # The upsert only adds quantity, so an existing line keeps its price;
+        # the sales rollup must be booked at that same price
+        stored = dict(
+            db.session.query(OrderItem.product_id, OrderItem.price_per_unit).filter(
+                OrderItem.order_id == order_id, OrderItem.product_id.in_(list(lines))
+            )
+        )
+        conflicts = [
+            {"product_id": product_id, "price_per_unit": str(stored[product_id])}
+            for product_id, (_, price) in sorted(lines.items())
+            if product_id in stored and price is not None and price != stored[product_id]
+        ]
+        if conflicts:
+            raise OrderItemsError(
+                "price_per_unit differs from the existing order line",
+                status_code=409,
+                details={"conflicts": conflicts},
+            )
+
+        rows = [
+            {
+                "order_id": order_id,
+                "product_id": product_id,
+                "quantity": quantity,
+                "price_per_unit": stored.get(
+                    product_id, price if price is not None else products[product_id][0]
+                ),
+            }
+            for product_id, (quantity, price) in sorted(lines.items())
+        ]
+        table = OrderItem.__table__
+        increment_many(table, keys=("order_id", "product_id"), deltas=("quantity",), rows=rows)
+
+        line_total = (
+            select(func.coalesce(func.sum(table.c.quantity * table.c.price_per_unit), 0))
+            .where(table.c.order_id == order_id)
+            .scalar_subquery()
+        )
+        db.session.execute(
+            update(Order.__table__)
+            .where(Order.__table__.c.id == order_id)
+            .values(total_amount=line_total)
+        )
+        new_total = db.session.execute(
+            select(Order.__table__.c.total_amount).where(Order.__table__.c.id == order_id)
+        ).scalar_one()
+        order_total_changed(order.order_date, order.status, order.total_amount, new_total)
+
+        record_sales(
+            [
+                (row["product_id"], products[row["product_id"]][1], row["quantity"], row["price_per_unit"])
+                for row in rows
+            ],
+            sold_at=order.order_date,
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Core inserts bypass the ORM hooks that feed autocomplete popularity
+    for row in rows:
+        product_autocomplete.add_popularity(row["product_id"], row["quantity"])
+
+    db.session.refresh(order)
+    order_items = OrderItem.query.filter(OrderItem.order_id == order_id).order_by(OrderItem.id).all()
+    return order, order_items
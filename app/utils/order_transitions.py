@@ -0,0 +1,91 @@
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models.order import Order, OrderStatus
+from app.utils.revenue import order_statuses_changed
+
+# Allowed order lifecycle moves: current status -> statuses it may move to
+ORDER_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.PROCESSING, OrderStatus.CANCELLED},
+    OrderStatus.PROCESSING: {OrderStatus.SHIPPED, OrderStatus.CANCELLED},
+    OrderStatus.SHIPPED: {OrderStatus.DELIVERED},
+    OrderStatus.DELIVERED: set(),
+    OrderStatus.CANCELLED: set(),
+}
+
+
+def sources_for(target):
+    """Statuses an order may be in to move to `target`"""
+    return {source for source, targets in ORDER_TRANSITIONS.items() if target in targets}
+
+
+def _transition_chunk(order_ids, target, sources):
+    # Lock the chunk's rows first so the statuses we judge by are the ones
+    # the UPDATE sees (FOR UPDATE is a no-op on SQLite, which has no
+    # concurrent writers anyway)
+    current = {
+        order_id: (status, order_date, total_amount)
+        for order_id, status, order_date, total_amount in db.session.query(
+            Order.id, Order.status, Order.order_date, Order.total_amount
+        )
+        .filter(Order.id.in_(order_ids))
+        .with_for_update()
+    }
+
+    results = {}
+    applicable = []
+    status_changes = []
+    for order_id in order_ids:
+        status, order_date, total_amount = current.get(order_id, (None, None, None))
+        if status is None:
+            results[order_id] = {"id": order_id, "result": "rejected", "reason": "Order not found"}
+        elif status == target:
+            results[order_id] = {
+                "id": order_id,
+                "result": "rejected",
+                "reason": f"Order is already {target.value}",
+            }
+        elif status not in sources:
+            results[order_id] = {
+                "id": order_id,
+                "result": "rejected",
+                "reason": f"Cannot move from {status.value} to {target.value}",
+            }
+        else:
+            applicable.append(order_id)
+            status_changes.append((order_date, total_amount, status, target))
+            results[order_id] = {"id": order_id, "result": "applied", "from": status.value}
+
+    if applicable:
+        db.session.execute(
+            update(Order)
+            .where(Order.id.in_(applicable), Order.status.in_(sources))
+            .values(status=target)
+            .execution_options(synchronize_session=False)
+        )
+        # Core UPDATE: report cancellations to the revenue rollups ourselves
+        order_statuses_changed(status_changes)
+    db.session.commit()
+    return [results[order_id] for order_id in order_ids]
+
+
+def transition_orders(order_ids, target, chunk_size=1000):
+    """
+    Move many orders to `target` with set-based UPDATEs.
+
+    Ids are processed in chunks of `chunk_size`; each chunk is one locking
+    SELECT, one UPDATE ... WHERE id IN (...) AND status IN (allowed sources),
+    the matching revenue deltas and one commit, so a large wave never holds row locks for long. Returns
+    one result per distinct id, in request order.
+    """
+    sources = sources_for(target)
+    order_ids = list(dict.fromkeys(order_ids))
+    results = []
+    for start in range(0, len(order_ids), chunk_size):
+        chunk = order_ids[start:start + chunk_size]
+        try:
+            results.extend(_transition_chunk(chunk, target, sources))
+        except Exception:
+            db.session.rollback()
+            raise
+    return results
@@ -0,0 +1,272 @@
+import json
+import random
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from enum import Enum
+
+from flask import current_app
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.order import Order
+from app.models.outbox_event import OutboxEvent, OutboxStatus
+from app.models.payment import Payment
+
+# Models whose inserts are published, with their aggregate name
+_PUBLISHED = ((Order, "order"), (Payment, "payment"))
+
+
+def _json_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _payload(instance):
+    # Column values as flushed: serialize() assumes attributes were reloaded
+    # (e.g. enums), while routes may still hold the raw request strings here
+    values = {
+        attr.key: getattr(instance, attr.key) for attr in inspect(instance).mapper.column_attrs
+    }
+    return json.dumps(values, default=_json_value)
+
+
+def _event_rows(session):
+    rows = []
+    for instance in session.new:
+        for model, aggregate in _PUBLISHED:
+            if isinstance(instance, model):
+                rows.append(
+                    {
+                        "event_type": f"{aggregate}.created",
+                        "aggregate_type": aggregate,
+                        "aggregate_id": instance.id,
+                        "payload": _payload(instance),
+                    }
+                )
+    return rows
+
+
+class OutboxWorker:
+    """
+    Delivers outbox events to registered handlers, at least once.
+
+    Events are written by a session hook in the same flush as the Order or
+    Payment they describe. The worker claims due events in batches by
+    pushing their available_at forward (a lease), runs the handlers on a
+    thread pool and then marks them delivered, or schedules a retry with
+    exponential backoff. An event whose worker died is picked up again when
+    its lease runs out, so handlers must tolerate duplicates.
+    """
+
+    def __init__(self):
+        self.handlers = defaultdict(list)
+        self.threads = 0
+        self.batch_size = 100
+        self.poll_interval = 1.0
+        self.max_attempts = 10
+        self.backoff_base = 2
+        self.backoff_max = 3600
+        self.lease_seconds = 300
+        self.delivered = 0
+        self.retried = 0
+        self.failed = 0
+        self.last_batch_at = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._listening = False
+
+    def init_app(self, app):
+        self.threads = app.config["OUTBOX_WORKER_THREADS"]
+        self.batch_size = app.config["OUTBOX_BATCH_SIZE"]
+        self.poll_interval = app.config["OUTBOX_POLL_INTERVAL"]
+        self.max_attempts = app.config["OUTBOX_MAX_ATTEMPTS"]
+        self.backoff_base = app.config["OUTBOX_BACKOFF_BASE"]
+        self.backoff_max = app.config["OUTBOX_BACKOFF_MAX"]
+        self.lease_seconds = app.config["OUTBOX_LEASE_SECONDS"]
+        self.listen()
+
+    def handler(self, event_type):
+        """Register fn(event) for `event_type`, e.g. @outbox_worker.handler("order.created")"""
+
+        def register(fn):
+            self.handlers[event_type].append(fn)
+            return fn
+
+        return register
+
+    def _enqueue(self, session, flush_context):
+        rows = _event_rows(session)
+        if rows:
+            now = datetime.utcnow()
+            for row in rows:
+                row.update(
+                    status=OutboxStatus.PENDING, attempts=0, available_at=now, created_at=now
+                )
+            # Core insert on the flush's connection: same transaction as the rows
+            session.connection().execute(insert(OutboxEvent.__table__), rows)
+
+    def listen(self):
+        """Hook ORM session events; call once at startup"""
+        if self._listening:
+            return
+        event.listen(Session, "after_flush", self._enqueue)
+        self._listening = True
+
+    def _claim(self):
+        now = datetime.utcnow()
+        events = db.session.execute(
+            select(
+                OutboxEvent.id,
+                OutboxEvent.event_type,
+                OutboxEvent.aggregate_type,
+                OutboxEvent.aggregate_id,
+                OutboxEvent.payload,
+                OutboxEvent.attempts,
+            )
+            .where(OutboxEvent.status == OutboxStatus.PENDING, OutboxEvent.available_at <= now)
+            .order_by(OutboxEvent.available_at, OutboxEvent.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if events:
+            db.session.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_([row.id for row in events]))
+                .values(
+                    attempts=OutboxEvent.attempts + 1,
+                    available_at=now + timedelta(seconds=self.lease_seconds),
+                )
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+        return [
+            {
+                "id": row.id,
+                "type": row.event_type,
+                "aggregate_type": row.aggregate_type,
+                "aggregate_id": row.aggregate_id,
+                "payload": json.loads(row.payload),
+                "attempt": row.attempts + 1,
+            }
+            for row in events
+        ]
+
+    def _deliver(self, app, outbox_event):
+        with app.app_context():
+            try:
+                for fn in self.handlers.get(outbox_event["type"], ()):
+                    fn(outbox_event)
+            finally:
+                db.session.remove()
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_base * 2 ** (attempt - 1), self.backoff_max)
+        return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+    def _record(self, delivered, errors):
+        now = datetime.utcnow()
+        if delivered:
+            db.session.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(delivered))
+                .values(status=OutboxStatus.DELIVERED, delivered_at=now, last_error=None)
+                .execution_options(synchronize_session=False)
+            )
+        for outbox_event, error in errors:
+            values = {"last_error": f"{type(error).__name__}: {error}"[:2000]}
+            if outbox_event["attempt"] >= self.max_attempts:
+                values["status"] = OutboxStatus.FAILED
+                self.failed += 1
+            else:
+                values["available_at"] = now + self._backoff(outbox_event["attempt"])
+                self.retried += 1
+            db.session.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id == outbox_event["id"])
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+        self.delivered += len(delivered)
+
+    def drain_batch(self, app, executor):
+        """Claim, deliver and record one batch; returns the number of events handled"""
+        events = self._claim()
+        if not events:
+            return 0
+        futures = [
+            (outbox_event, executor.submit(self._deliver, app, outbox_event))
+            for outbox_event in events
+        ]
+        delivered, errors = [], []
+        for outbox_event, future in futures:
+            error = future.exception()
+            if error is None:
+                delivered.append(outbox_event["id"])
+            else:
+                app.logger.warning("Outbox event %s failed: %s", outbox_event["id"], error)
+                errors.append((outbox_event, error))
+        self._record(delivered, errors)
+        self.last_batch_at = datetime.utcnow()
+        return len(events)
+
+    def run(self, app, threads=None, once=False):
+        """Poll and deliver until stopped (or, with once=True, until nothing is due)"""
+        with ThreadPoolExecutor(max_workers=threads or self.threads or 1) as executor:
+            while not self._stop.is_set():
+                with app.app_context():
+                    try:
+                        handled = self.drain_batch(app, executor)
+                    except Exception:
+                        app.logger.exception("Outbox batch failed")
+                        db.session.rollback()
+                        handled = 0
+                    finally:
+                        db.session.remove()
+                if handled >= self.batch_size:
+                    continue
+                if once:
+                    return
+                self._stop.wait(self.poll_interval)
+
+    def start(self, app):
+        if self._thread is not None or self.threads <= 0:
+            return
+        self._thread = threading.Thread(
+            target=self.run, args=(app,), name="outbox-worker", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            "threads": self.threads,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "failed": self.failed,
+            "last_batch_at": self.last_batch_at.isoformat() if self.last_batch_at else None,
+        }
+
+
+outbox_worker = OutboxWorker()
+
+
+@outbox_worker.handler("order.created")
+@outbox_worker.handler("payment.created")
+def log_event(outbox_event):
+    """Default subscriber; emails, ERP sync and analytics register alongside it"""
+    current_app.logger.info(
+        "%s %s #%s",
+        outbox_event["type"],
+        outbox_event["aggregate_type"],
+        outbox_event["aggregate_id"],
+    )
@@ -0,0 +1,101 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from flask import current_app, request
+from sqlalchemy import and_, or_
+
+from app.utils.query_params import QueryParamError
+
+
+class PaginationError(QueryParamError):
+    """Raised when the client sends an invalid page size or cursor"""
+
+
+def get_page_size():
+    """Read ?limit= from the query string, capped at PAGE_SIZE_MAX"""
+    default = current_app.config["PAGE_SIZE_DEFAULT"]
+    maximum = current_app.config["PAGE_SIZE_MAX"]
+
+    raw = request.args.get("limit")
+    if raw is None or raw == "":
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be greater than 0")
+    return min(limit, maximum)
+
+
+def _dump_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _load_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+    return value
+
+
+def encode_cursor(sort_key, value, row_id):
+    """Build an opaque cursor pointing just after (value, row_id)"""
+    payload = json.dumps(
+        {"k": sort_key, "v": _dump_value(value), "id": row_id}, separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, sort_key):
+    """Return (value, row_id) from a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload["k"] != sort_key:
+            raise PaginationError("cursor does not match the requested sort")
+        return _load_value(payload["v"]), int(payload["id"])
+    except PaginationError:
+        raise
+    except Exception:
+        raise PaginationError("Invalid cursor")
+
+
+def keyset_page(query, sort_key, sort_column, id_column, limit, cursor=None, descending=False):
+    """
+    Fetch one page of `query` ordered by (sort_column, id_column).
+
+    The cursor is turned into a WHERE clause on the composite key instead of an
+    OFFSET, so any page costs one index range scan of `limit` rows.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_key)
+        if descending:
+            after = or_(sort_column < value, and_(sort_column == value, id_column < last_id))
+        else:
+            after = or_(sort_column > value, and_(sort_column == value, id_column > last_id))
+        query = query.filter(after)
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            sort_key, getattr(last, sort_column.key), getattr(last, id_column.key)
+        )
+    return rows, next_cursor
@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import bcrypt
+
+# Latency samples kept for the percentiles reported in stats()
+LATENCY_WINDOW = 1000
+
+
+class HasherBusy(Exception):
+    """The hashing pool is saturated; the caller should answer 503"""
+
+    def __init__(self, retry_after=1):
+        super().__init__("Password hashing is saturated, retry shortly")
+        self.retry_after = retry_after
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 1)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded thread pool instead of the request worker.
+
+    bcrypt releases the GIL while it works, so `threads` hashes proceed in
+    parallel while the request threads stay free to serve other endpoints.
+    At most `queue_max` calls wait behind the running ones; beyond that,
+    and when a call has not completed within `timeout` seconds, it fails
+    fast with HasherBusy instead of piling up.
+    """
+
+    def __init__(self):
+        self.rounds = 12
+        self.threads = os.cpu_count() or 1
+        self.queue_max = 32
+        self.timeout = 10.0
+        self.hashed = 0
+        self.verified = 0
+        self.rehashed = 0
+        self.shed = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._wait_ms = deque(maxlen=LATENCY_WINDOW)
+        self._hash_ms = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def init_app(self, app):
+        self.rounds = app.config["BCRYPT_ROUNDS"]
+        self.threads = app.config["PASSWORD_HASH_THREADS"] or os.cpu_count() or 1
+        self.queue_max = app.config["PASSWORD_HASH_QUEUE_MAX"]
+        self.timeout = app.config["PASSWORD_HASH_TIMEOUT"]
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="bcrypt")
+            return self._executor
+
+    def _timed(self, queued_at, fn, *args):
+        started = time.perf_counter()
+        self._wait_ms.append((started - queued_at) * 1000)
+        try:
+            return fn(*args)
+        finally:
+            self._hash_ms.append((time.perf_counter() - started) * 1000)
+
+    def _done(self, future):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self.in_flight >= self.threads + self.queue_max:
+                self.shed += 1
+                raise HasherBusy()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            future = self._pool().submit(self._timed, time.perf_counter(), fn, *args)
+        except Exception:
+            self._done(None)
+            raise
+        # Counted until the pool is done with it, even if the caller gave up
+        future.add_done_callback(self._done)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            with self._lock:
+                self.shed += 1
+            raise HasherBusy()
+
+    def hash(self, password):
+        """bcrypt hash of `password` (str) at the configured cost, as str"""
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        hashed = self._run(bcrypt.hashpw, password.encode("utf-8"), salt)
+        self.hashed += 1
+        return hashed.decode("utf-8")
+
+    def verify(self, password, hashed):
+        matched = self._run(bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+        self.verified += 1
+        return matched
+
+    def needs_rehash(self, hashed):
+        """True when `hashed` was made with a different cost than BCRYPT_ROUNDS"""
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def upgrade(self, password, hashed):
+        """
+        New hash of a just-verified `password` when `hashed` used another
+        cost, else None. A saturated pool also returns None: the upgrade is
+        retried on a later login rather than failing this one.
+        """
+        if not self.needs_rehash(hashed):
+            return None
+        try:
+            new_hash = self.hash(password)
+        except HasherBusy:
+            return None
+        self.rehashed += 1
+        return new_hash
+
+    def stats(self):
+        wait_ms, hash_ms = list(self._wait_ms), list(self._hash_ms)
+        return {
+            "rounds": self.rounds,
+            "threads": self.threads,
+            "queue_max": self.queue_max,
+            "in_flight": self.in_flight,
+            "queue_depth": max(0, self.in_flight - self.threads),
+            "peak_in_flight": self.peak_in_flight,
+            "hashed": self.hashed,
+            "verified": self.verified,
+            "rehashed": self.rehashed,
+            "shed": self.shed,
+            "wait_ms_p50": _percentile(wait_ms, 0.5),
+            "wait_ms_p95": _percentile(wait_ms, 0.95),
+            "hash_ms_p50": _percentile(hash_ms, 0.5),
+            "hash_ms_p95": _percentile(hash_ms, 0.95),
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,241 @@
+import codecs
+import csv
+import json
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects import mysql, sqlite
+
+from app.extensions import catalog_cache, db
+from app.models.category import Category
+from app.models.product import Product
+from app.utils.autocomplete import product_autocomplete
+
+FORMATS = ("ndjson", "csv")
+
+_UPDATABLE = ("category_id", "name", "description", "price", "stock_quantity", "image_url")
+
+
+class RowError(ValueError):
+    """A single input row failed validation"""
+
+
+def detect_format(content_type=None, filename=None):
+    """Guess the import format from a Content-Type header or file name"""
+    content_type = (content_type or "").lower()
+    filename = (filename or "").lower()
+    if "csv" in content_type or filename.endswith(".csv"):
+        return "csv"
+    if "ndjson" in content_type or "jsonl" in content_type or filename.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
+
+
+def iter_records(stream, fmt):
+    """
+    Yield (line_number, record_or_RowError) from a binary stream without
+    reading it into memory.
+    """
+    text = codecs.getreader("utf-8")(stream)
+
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, RowError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield line_number, RowError("Each line must be a JSON object")
+            continue
+        yield line_number, record
+
+
+def _required(record, field):
+    value = record.get(field)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        raise RowError(f"{field} is required")
+    return value.strip() if isinstance(value, str) else value
+
+
+def _integer(record, field, minimum=None):
+    try:
+        value = int(_required(record, field))
+    except (TypeError, ValueError):
+        raise RowError(f"{field} must be an integer")
+    if minimum is not None and value < minimum:
+        raise RowError(f"{field} must be >= {minimum}")
+    return value
+
+
+def validate_record(record, category_ids):
+    """Turn a raw NDJSON/CSV record into a products row, or raise RowError"""
+    try:
+        price = Decimal(str(_required(record, "price")))
+    except InvalidOperation:
+        raise RowError("price must be a number")
+    if not price.is_finite() or price < 0:
+        raise RowError("price must be a non-negative number")
+
+    row = {
+        "category_id": _integer(record, "category_id"),
+        "name": str(_required(record, "name"))[:255],
+        "description": str(_required(record, "description")),
+        "price": price.quantize(Decimal("0.01")),
+        "sku": str(_required(record, "sku"))[:100],
+        "stock_quantity": _integer(record, "stock_quantity", minimum=0),
+        "image_url": (record.get("image_url") or None),
+    }
+    if row["category_id"] not in category_ids:
+        raise RowError(f"Unknown category_id {row['category_id']}")
+    return row
+
+
+def _upsert_statement():
+    table = Product.__table__
+    dialect = db.engine.dialect.name
+
+    if dialect == "sqlite":
+        stmt = sqlite.insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.sku],
+            set_={name: stmt.excluded[name] for name in (*_UPDATABLE, "updated_at")},
+        )
+    if dialect in ("mysql", "mariadb"):
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(
+            {name: stmt.inserted[name] for name in (*_UPDATABLE, "updated_at")}
+        )
+    return None
+
+
+def _generic_upsert(rows):
+    """Fallback for backends without INSERT ... ON CONFLICT support"""
+    table = Product.__table__
+    skus = [row["sku"] for row in rows]
+    existing = set(db.session.scalars(select(table.c.sku).where(table.c.sku.in_(skus))))
+
+    inserts = {row["sku"]: row for row in rows if row["sku"] not in existing}
+    updates = [dict(row, b_sku=row["sku"]) for row in rows if row["sku"] in existing]
+    if inserts:
+        db.session.execute(table.insert(), list(inserts.values()))
+    if updates:
+        db.session.execute(
+            table.update()
+            .where(table.c.sku == bindparam("b_sku"))
+            .values({name: bindparam(name) for name in (*_UPDATABLE, "updated_at")}),
+            updates,
+        )
+
+
+def _write_batch(rows, statement):
+    now = datetime.utcnow()
+    params = [dict(row, created_at=now, updated_at=now) for row in rows]
+    if statement is not None:
+        db.session.execute(statement, params)
+    else:
+        _generic_upsert(params)
+
+
+def _invalidate_cached(rows, category_ids):
+    skus = [row["sku"] for row in rows]
+    ids = db.session.scalars(select(Product.id).where(Product.sku.in_(skus)))
+    # An upsert may have moved a product out of any category, so every
+    # category's stats are dropped along with the touched products
+    catalog_cache.invalidate(
+        *(("product", product_id) for product_id in ids),
+        *(("category_stats", category_id) for category_id in category_ids),
+    )
+
+
+class ImportResult:
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.processed = 0
+        self.upserted = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    def error(self, line_number, sku, message):
+        self.failed += 1
+        # Only the first max_errors are kept so a bad file cannot grow memory
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line_number, "sku": sku, "error": message})
+
+    def serialize(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "processed": self.processed,
+            "upserted": self.upserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.processed / elapsed, 1) if elapsed else None,
+        }
+
+
+def import_products(stream, fmt, batch_size, max_errors=100):
+    """
+    Stream NDJSON or CSV product rows into `products`, upserting by sku.
+
+    Rows are validated one at a time and written in batches of batch_size
+    with one multi-row upsert and one commit per batch, so memory is bounded
+    by the batch size rather than the file size. A batch rejected by the
+    database is retried row by row to report exactly which lines failed.
+    """
+    result = ImportResult(max_errors)
+    category_ids = set(db.session.scalars(select(Category.id)))
+    statement = _upsert_statement()
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        rows = [row for _, row in batch]
+        try:
+            _write_batch(rows, statement)
+            db.session.commit()
+            result.upserted += len(rows)
+        except Exception:
+            db.session.rollback()
+            for line_number, row in batch:
+                try:
+                    _write_batch([row], statement)
+                    db.session.commit()
+                    result.upserted += 1
+                except Exception as e:
+                    db.session.rollback()
+                    result.error(line_number, row["sku"], str(getattr(e, "orig", e)))
+        _invalidate_cached(rows, category_ids)
+        batch.clear()
+
+    for line_number, record in iter_records(stream, fmt):
+        result.processed += 1
+        try:
+            if isinstance(record, RowError):
+                raise record
+            batch.append((line_number, validate_record(record, category_ids)))
+        except RowError as e:
+            sku = record.get("sku") if isinstance(record, dict) else None
+            result.error(line_number, sku, str(e))
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    # Core upserts bypass the ORM commit hooks, so reload the name index
+    product_autocomplete.mark_stale()
+
+    return result
@@ -0,0 +1,25 @@
+from app.models.product import Product
+from app.utils.query_params import bool_arg
+
+# ?sort= value -> (column, descending). Every option is backed by a
+# (column, id) composite index so keyset pages never need a filesort.
+PRODUCT_SORTS = {
+    "created_at": (Product.created_at, False),
+    "-created_at": (Product.created_at, True),
+    "price": (Product.price, False),
+    "-price": (Product.price, True),
+}
+
+# Columns that ?fields= may never expose: reserved_quantity changes with
+# every hold and is not part of Product.serialize() (see availability)
+PRODUCT_HIDDEN_FIELDS = ("reserved_quantity",)
+
+
+def in_stock_filters():
+    """?in_stock as filter conditions: true for stock_quantity > 0, false for sold-out products"""
+    in_stock = bool_arg("in_stock")
+    if in_stock is True:
+        return [Product.stock_quantity > 0]
+    if in_stock is False:
+        return [Product.stock_quantity <= 0]
+    return []
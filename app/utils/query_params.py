@@ -0,0 +1,57 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from flask import request
+
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"0", "false", "no", "off"}
+
+
+class QueryParamError(ValueError):
+    """Raised when a query string parameter cannot be parsed"""
+
+
+def int_arg(name, default=None):
+    raw = request.args.get(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        raise QueryParamError(f"{name} must be an integer")
+
+
+def decimal_arg(name, default=None):
+    raw = request.args.get(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        value = Decimal(raw)
+    except InvalidOperation:
+        raise QueryParamError(f"{name} must be a number")
+    if not value.is_finite():
+        raise QueryParamError(f"{name} must be a number")
+    return value
+
+
+def bool_arg(name, default=None):
+    raw = request.args.get(name)
+    if raw is None or raw == "":
+        return default
+    raw = raw.lower()
+    if raw in _TRUE:
+        return True
+    if raw in _FALSE:
+        return False
+    raise QueryParamError(f"{name} must be true or false")
+
+
+def datetime_arg(name, default=None):
+    """ISO 8601 date or datetime, e.g. 2024-05-01 or 2024-05-01T12:00:00"""
+    raw = request.args.get(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        return datetime.fromisoformat(raw)
+    except ValueError:
+        raise QueryParamError(f"{name} must be an ISO 8601 date or datetime")
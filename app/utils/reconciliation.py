@@ -0,0 +1,222 @@
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from flask import current_app
+from sqlalchemy import insert, select, update
+
+from app.extensions import db
+from app.models.payment import Payment, PaymentStatus
+from app.models.payment_reconciliation import (
+    PaymentReconciliation,
+    ReconciliationMismatch,
+    ReconciliationStatus,
+)
+from app.utils.product_import import RowError, iter_records
+from app.utils.revenue import payment_statuses_changed
+
+# Gateway status vocabulary -> PaymentStatus
+SETTLEMENT_STATUSES = {
+    "COMPLETED": PaymentStatus.COMPLETED,
+    "SETTLED": PaymentStatus.COMPLETED,
+    "CAPTURED": PaymentStatus.COMPLETED,
+    "SUCCEEDED": PaymentStatus.COMPLETED,
+    "PENDING": PaymentStatus.PENDING,
+    "FAILED": PaymentStatus.FAILED,
+    "DECLINED": PaymentStatus.FAILED,
+    "REFUNDED": PaymentStatus.REFUNDED,
+}
+
+
+class ReconciliationError(ValueError):
+    """The run cannot be started or resumed"""
+
+
+def _parse(record):
+    if isinstance(record, RowError):
+        raise record
+    transaction_id = (record.get("transaction_id") or "").strip()
+    if not transaction_id:
+        raise RowError("transaction_id is required")
+    try:
+        amount = Decimal(str(record.get("amount", "")).strip()).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise RowError("amount must be a number")
+    status = SETTLEMENT_STATUSES.get(str(record.get("status") or "").strip().upper())
+    if status is None:
+        raise RowError(f"Unknown status {record.get('status')!r}")
+    return transaction_id, amount, status
+
+
+def _mismatch(run, line, kind, transaction_id=None, payment_id=None, expected=None, actual=None, corrected=False):
+    return {
+        "reconciliation_id": run.id,
+        "line": line,
+        "transaction_id": transaction_id,
+        "kind": kind,
+        "payment_id": payment_id,
+        "expected": None if expected is None else str(expected)[:255],
+        "actual": None if actual is None else str(actual)[:255],
+        "corrected": corrected,
+    }
+
+
+def _process_chunk(run, chunk):
+    """Match one chunk with a single IN lookup and commit it with the checkpoint"""
+    parsed = []
+    mismatches = []
+    for line, record in chunk:
+        try:
+            parsed.append((line, *_parse(record)))
+        except RowError as e:
+            transaction_id = record.get("transaction_id") if isinstance(record, dict) else None
+            mismatches.append(_mismatch(run, line, "invalid", transaction_id, expected=str(e)))
+            run.invalid += 1
+
+    payments = {}
+    if parsed:
+        rows = db.session.execute(
+            select(
+                Payment.id, Payment.transaction_id, Payment.amount, Payment.status, Payment.payment_date
+            ).where(Payment.transaction_id.in_({row[1] for row in parsed}))
+        )
+        payments = {
+            transaction_id: (payment_id, amount, status, payment_date)
+            for payment_id, transaction_id, amount, status, payment_date in rows
+        }
+
+    # Last status the file gives each payment; an earlier line for the same
+    # payment in this chunk is superseded rather than applied twice
+    targets = {}
+    for line, transaction_id, amount, status in parsed:
+        payment = payments.get(transaction_id)
+        if payment is None:
+            mismatches.append(_mismatch(run, line, "missing", transaction_id, expected=amount))
+            run.missing += 1
+            continue
+
+        payment_id, payment_amount, payment_status, payment_date = payment
+        clean = True
+        status_row = None
+        if payment_amount != amount:
+            mismatches.append(
+                _mismatch(run, line, "amount", transaction_id, payment_id, amount, payment_amount)
+            )
+            run.amount_mismatches += 1
+            clean = False
+        if payment_status != status:
+            status_row = len(mismatches)
+            mismatches.append(
+                _mismatch(
+                    run,
+                    line,
+                    "status",
+                    transaction_id,
+                    payment_id,
+                    status.value,
+                    payment_status.value,
+                )
+            )
+            run.status_mismatches += 1
+            clean = False
+        if clean:
+            run.matched += 1
+        if run.apply_fixes:
+            targets[payment_id] = (status, payment, status_row)
+
+    # Only the line whose status is applied is marked corrected, one per
+    # payment, matching run.corrected
+    fixes = {}
+    status_changes = []
+    for payment_id, (status, payment, status_row) in targets.items():
+        _, payment_amount, payment_status, payment_date = payment
+        if status != payment_status:
+            fixes.setdefault(status, []).append(payment_id)
+            status_changes.append((payment_date, payment_amount, payment_status, status))
+            mismatches[status_row]["corrected"] = True
+
+    # One UPDATE per target status for the whole chunk
+    for status, payment_ids in fixes.items():
+        db.session.execute(
+            update(Payment)
+            .where(Payment.id.in_(payment_ids))
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        )
+        run.corrected += len(payment_ids)
+    # Core UPDATEs skip the flush hook that keeps the revenue rollups current
+    if status_changes:
+        payment_statuses_changed(status_changes)
+    if mismatches:
+        db.session.execute(insert(ReconciliationMismatch.__table__), mismatches)
+    run.lines_processed += len(chunk)
+    db.session.commit()
+
+
+def start_reconciliation(name, apply_fixes=False, resume_id=None):
+    """
+    Create a run, or reopen an interrupted one to continue where it stopped.
+
+    The run row is locked while it is reopened. Only FAILED runs and RUNNING
+    runs whose last checkpoint is older than RECONCILE_STALE_SECONDS (the
+    worker died) can be resumed, so two workers never process the same run.
+    """
+    if resume_id is None:
+        run = PaymentReconciliation(name=name, apply_fixes=apply_fixes)
+        db.session.add(run)
+        db.session.commit()
+        return run
+
+    run = db.session.get(PaymentReconciliation, resume_id, with_for_update=True)
+    if run is None:
+        db.session.rollback()
+        raise ReconciliationError(f"Reconciliation {resume_id} not found")
+    if run.status == ReconciliationStatus.COMPLETED:
+        db.session.rollback()
+        raise ReconciliationError(f"Reconciliation {resume_id} already completed")
+    now = datetime.utcnow()
+    stale_after = timedelta(seconds=current_app.config["RECONCILE_STALE_SECONDS"])
+    if run.status == ReconciliationStatus.RUNNING and run.updated_at > now - stale_after:
+        db.session.rollback()
+        raise ReconciliationError(f"Reconciliation {resume_id} is still running")
+    run.status = ReconciliationStatus.RUNNING
+    run.error = None
+    # Claim it: another resume now sees a fresh checkpoint
+    run.updated_at = now
+    db.session.commit()
+    return run
+
+
+def reconcile_payments(stream, fmt, run, chunk_size):
+    """
+    Stream a settlement file (CSV or NDJSON with transaction_id, amount and
+    status columns) and match it against payments.
+
+    Records are matched `chunk_size` at a time with one IN lookup on the
+    transaction_id index. Each chunk's status corrections (one UPDATE per
+    target status, only when run.apply_fixes), its mismatch rows and the
+    run's progress counter commit together. Memory is bounded by the chunk,
+    and re-running with the same run skips the records already processed.
+    """
+    skip = run.lines_processed
+    chunk = []
+    try:
+        for index, (line, record) in enumerate(iter_records(stream, fmt), start=1):
+            if index <= skip:
+                continue
+            chunk.append((line, record))
+            if len(chunk) >= chunk_size:
+                _process_chunk(run, chunk)
+                chunk = []
+        if chunk:
+            _process_chunk(run, chunk)
+    except Exception as e:
+        db.session.rollback()
+        run.status = ReconciliationStatus.FAILED
+        run.error = str(e)[:2000]
+        db.session.commit()
+        raise
+
+    run.status = ReconciliationStatus.COMPLETED
+    run.finished_at = datetime.utcnow()
+    db.session.commit()
+    return run
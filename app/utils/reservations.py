@@ -0,0 +1,358 @@
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, select, update
+
+from app.extensions import catalog_cache, db
+from app.models.inventory_reservation import InventoryReservation, ReservationStatus
+from app.models.order import Order
+from app.models.product import Product
+from app.utils.checkout import CheckoutError, merge_lines, shortages
+
+
+class ReservationError(CheckoutError):
+    """Reservation request rejected; same shape as CheckoutError"""
+
+
+def _by_product(rows):
+    """Sum (id, product_id, quantity) rows per product"""
+    totals = defaultdict(int)
+    for _, product_id, quantity in rows:
+        totals[product_id] += quantity
+    return dict(totals)
+
+
+def _per_product(table, totals):
+    return case(
+        *((table.c.id == product_id, quantity) for product_id, quantity in totals.items()),
+        else_=0,
+    )
+
+
+def _lock_active(*criteria, limit=None):
+    """(id, product_id, quantity) of the ACTIVE holds matching `criteria`, row-locked"""
+    query = db.session.query(
+        InventoryReservation.id, InventoryReservation.product_id, InventoryReservation.quantity
+    ).filter(InventoryReservation.status == ReservationStatus.ACTIVE, *criteria)
+    if limit is not None:
+        query = query.order_by(InventoryReservation.expires_at).limit(limit)
+    return query.with_for_update().all()
+
+
+def _finish(rows, status, now, order_id=None):
+    """
+    Move locked ACTIVE holds to `status` and give their units back.
+
+    CONFIRMED holds turn into sold stock (stock_quantity goes down with
+    reserved_quantity); RELEASED and EXPIRED ones only free the hold.
+    """
+    if not rows:
+        return
+    values = {"status": status, "updated_at": now}
+    if order_id is not None:
+        values["order_id"] = order_id
+    db.session.execute(
+        update(InventoryReservation)
+        .where(
+            InventoryReservation.id.in_([row[0] for row in rows]),
+            InventoryReservation.status == ReservationStatus.ACTIVE,
+        )
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+    table = Product.__table__
+    totals = _by_product(rows)
+    held = _per_product(table, totals)
+    product_values = {"reserved_quantity": table.c.reserved_quantity - held}
+    if status == ReservationStatus.CONFIRMED:
+        product_values.update(stock_quantity=table.c.stock_quantity - held, updated_at=now)
+    db.session.execute(
+        update(table).where(table.c.id.in_(list(totals))).values(**product_values)
+    )
+
+
+def _expire_for_products(product_ids, now):
+    """Release expired holds of these products so they count as available again"""
+    rows = _lock_active(
+        InventoryReservation.product_id.in_(product_ids),
+        InventoryReservation.expires_at <= now,
+    )
+    _finish(rows, ReservationStatus.EXPIRED, now)
+
+
+def sell_reservations(reservation_ids, quantities, order_id, now):
+    """
+    Turn the buyer's own holds into sales for a checkout in progress.
+
+    The holds are confirmed (reserved_quantity and stock_quantity go down
+    together) and the units they cover are taken off `quantities`; returns
+    what is left to take from unreserved stock. Runs in the checkout's
+    transaction, which commits or rolls back everything.
+    """
+    rows = _lock_active(
+        InventoryReservation.id.in_(reservation_ids),
+        InventoryReservation.expires_at > now,
+    )
+    unusable = sorted(set(reservation_ids) - {row[0] for row in rows})
+    if unusable:
+        raise ReservationError(
+            "Reservations are expired, released or already confirmed",
+            status_code=409,
+            details={"reservation_ids": unusable},
+        )
+    held = _by_product(rows)
+    extra = sorted(
+        product_id for product_id, quantity in held.items() if quantity > quantities.get(product_id, 0)
+    )
+    if extra:
+        raise ReservationError(
+            "Reservations hold more than the cart asks for", details={"product_ids": extra}
+        )
+
+    _finish(rows, ReservationStatus.CONFIRMED, now, order_id=order_id)
+    return {
+        product_id: quantity - held.get(product_id, 0)
+        for product_id, quantity in quantities.items()
+        if quantity > held.get(product_id, 0)
+    }
+
+
+def reserve(items, ttl_seconds, order_id=None):
+    """
+    Hold stock for every line for `ttl_seconds`, all or nothing.
+
+    The hold is one conditional UPDATE of products.reserved_quantity (guarded
+    by stock_quantity - reserved_quantity >= wanted) committed right away, so
+    product rows are locked for a single statement rather than for the whole
+    time between cart and payment.
+    """
+    quantities = merge_lines(items)
+    now = datetime.utcnow()
+
+    try:
+        if order_id is not None and db.session.get(Order, order_id) is None:
+            raise ReservationError("Order not found", status_code=404)
+        known = set(
+            db.session.scalars(
+                select(Product.id).where(Product.id.in_(list(quantities)))
+            )
+        )
+        missing = sorted(set(quantities) - known)
+        if missing:
+            raise ReservationError("Unknown products", details={"missing": missing})
+
+        _expire_for_products(list(quantities), now)
+
+        table = Product.__table__
+        wanted = _per_product(table, quantities)
+        result = db.session.execute(
+            update(table)
+            .where(
+                table.c.id.in_(list(quantities)),
+                table.c.stock_quantity - table.c.reserved_quantity >= wanted,
+            )
+            .values(reserved_quantity=table.c.reserved_quantity + wanted)
+        )
+        if result.rowcount != len(quantities):
+            raise ReservationError(
+                "Insufficient stock", status_code=409, details={"shortages": shortages(quantities)}
+            )
+
+        reservations = [
+            InventoryReservation(
+                product_id=product_id,
+                order_id=order_id,
+                quantity=quantity,
+                status=ReservationStatus.ACTIVE,
+                expires_at=now + timedelta(seconds=ttl_seconds),
+            )
+            for product_id, quantity in sorted(quantities.items())
+        ]
+        db.session.add_all(reservations)
+        db.session.commit()
+        return reservations
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def _reservation_ids(reservation_ids):
+    if not isinstance(reservation_ids, list) or not reservation_ids:
+        raise ReservationError("reservation_ids must be a non-empty list")
+    try:
+        return list(dict.fromkeys(int(reservation_id) for reservation_id in reservation_ids))
+    except (TypeError, ValueError):
+        raise ReservationError("reservation_ids must be integers")
+
+
+def confirm(reservation_ids, order_id):
+    """
+    Turn active holds into sold stock for `order_id`, all or nothing.
+
+    Holds that expired, were released or were already confirmed make the
+    whole call fail with 409 and leave every hold untouched.
+    """
+    reservation_ids = _reservation_ids(reservation_ids)
+    now = datetime.utcnow()
+
+    try:
+        if db.session.get(Order, order_id) is None:
+            raise ReservationError("Order not found", status_code=404)
+
+        rows = _lock_active(
+            InventoryReservation.id.in_(reservation_ids),
+            InventoryReservation.expires_at > now,
+        )
+        unusable = sorted(set(reservation_ids) - {row[0] for row in rows})
+        if unusable:
+            raise ReservationError(
+                "Reservations are expired, released or already confirmed",
+                status_code=409,
+                details={"reservation_ids": unusable},
+            )
+
+        _finish(rows, ReservationStatus.CONFIRMED, now, order_id=order_id)
+        product_ids = list(_by_product(rows))
+        category_ids = set(
+            db.session.scalars(
+                select(Product.category_id).where(Product.id.in_(product_ids))
+            )
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Stock was changed with Core, outside the ORM commit hooks
+    catalog_cache.invalidate(
+        *(("product", product_id) for product_id in product_ids),
+        *(("category_stats", category_id) for category_id in category_ids),
+    )
+    return len(rows)
+
+
+def release(reservation_ids):
+    """Give held units back; holds that are no longer active are skipped"""
+    reservation_ids = _reservation_ids(reservation_ids)
+    try:
+        rows = _lock_active(InventoryReservation.id.in_(reservation_ids))
+        _finish(rows, ReservationStatus.RELEASED, datetime.utcnow())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    released = {row[0] for row in rows}
+    return {
+        "released": sorted(released),
+        "skipped": [reservation_id for reservation_id in reservation_ids if reservation_id not in released],
+    }
+
+
+def availability(product_ids):
+    """
+    stock_quantity, reserved_quantity and available units per product.
+
+    Holds past expires_at that the sweeper has not reached yet are still in
+    products.reserved_quantity; they are subtracted here (read from the
+    product/status/expires_at index) instead of being expired, so this
+    stays a read-only query.
+    """
+    expired = dict(
+        db.session.query(InventoryReservation.product_id, func.sum(InventoryReservation.quantity))
+        .filter(
+            InventoryReservation.product_id.in_(product_ids),
+            InventoryReservation.status == ReservationStatus.ACTIVE,
+            InventoryReservation.expires_at <= datetime.utcnow(),
+        )
+        .group_by(InventoryReservation.product_id)
+        .all()
+    )
+    rows = db.session.query(
+        Product.id, Product.stock_quantity, Product.reserved_quantity
+    ).filter(Product.id.in_(product_ids))
+    result = []
+    for product_id, stock, reserved in rows:
+        reserved -= int(expired.get(product_id) or 0)
+        result.append(
+            {
+                "product_id": product_id,
+                "stock_quantity": stock,
+                "reserved_quantity": reserved,
+                "available": stock - reserved,
+            }
+        )
+    return result
+
+
+def sweep_expired(batch_size=500):
+    """
+    Expire every ACTIVE hold past its expires_at, `batch_size` at a time.
+
+    Each batch is read oldest-first from the (status, expires_at) index,
+    released with two set-based UPDATEs and committed on its own, so the
+    sweeper never holds many row locks at once. Returns the number swept.
+    """
+    swept = 0
+    while True:
+        now = datetime.utcnow()
+        try:
+            rows = _lock_active(InventoryReservation.expires_at <= now, limit=batch_size)
+            _finish(rows, ReservationStatus.EXPIRED, now)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        swept += len(rows)
+        if len(rows) < batch_size:
+            return swept
+
+
+class ReservationSweeper:
+    """Background thread that expires stale holds every `interval` seconds"""
+
+    def __init__(self):
+        self.interval = 0
+        self.batch_size = 500
+        self.swept = 0
+        self.last_run = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        self.interval = app.config["RESERVATION_SWEEP_INTERVAL"]
+        self.batch_size = app.config["RESERVATION_SWEEP_BATCH_SIZE"]
+
+    def start(self, app):
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._thread = threading.Thread(
+            target=self._run, args=(app,), name="reservation-sweeper", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            "interval_seconds": self.interval,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "swept": self.swept,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+        }
+
+    def _run(self, app):
+        while not self._stop.wait(self.interval):
+            with app.app_context():
+                try:
+                    self.swept += sweep_expired(self.batch_size)
+                    self.last_run = datetime.utcnow()
+                except Exception:
+                    app.logger.exception("Reservation sweep failed")
+                finally:
+                    db.session.remove()
+
+
+reservation_sweeper = ReservationSweeper()
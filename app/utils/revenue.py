@@ -0,0 +1,423 @@
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.order import Order, OrderStatus
+from app.models.payment import Payment, PaymentStatus
+from app.models.revenue import RevenueDaily, RevenueDelta, RevenueHourly
+from app.utils.rollups import increment_many
+
+GRANULARITIES = {"day": RevenueDaily, "hour": RevenueHourly}
+
+MEASURES = ("order_count", "gross_revenue", "refund_count", "refunded_amount")
+
+_ZERO = Decimal("0")
+_CENT = Decimal("0.01")
+
+
+def _timestamp(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    return value or datetime.utcnow()
+
+
+def _money(value):
+    return _ZERO if value is None else Decimal(str(value))
+
+
+def _hour(timestamp):
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def _day(timestamp):
+    return timestamp.date()
+
+
+def _order_contribution(order_date, total_amount, status):
+    # Cancelled orders leave order_count, gross revenue and AOV
+    if status in (OrderStatus.CANCELLED, OrderStatus.CANCELLED.value):
+        return None
+    return _timestamp(order_date), (1, _money(total_amount), 0, _ZERO)
+
+
+def _payment_contribution(payment_date, status, amount):
+    if status not in (PaymentStatus.REFUNDED, PaymentStatus.REFUNDED.value):
+        return None
+    return _timestamp(payment_date), (0, _ZERO, 1, _money(amount))
+
+
+class RevenueDeltas:
+    """Signed changes to the revenue rollups, bucketed by timestamp"""
+
+    def __init__(self):
+        self._by_time = defaultdict(lambda: [0, _ZERO, 0, _ZERO])
+
+    def add(self, contribution, sign=1):
+        if contribution is None:
+            return
+        timestamp, values = contribution
+        bucket = self._by_time[timestamp]
+        for index, value in enumerate(values):
+            bucket[index] += sign * value
+
+    def __bool__(self):
+        return bool(self._by_time)
+
+    def replace(self, old, new):
+        self.add(old, -1)
+        self.add(new)
+
+    def _rows(self, key, bucket_of):
+        totals = defaultdict(lambda: [0, _ZERO, 0, _ZERO])
+        for timestamp, values in self._by_time.items():
+            bucket = totals[bucket_of(timestamp)]
+            for index, value in enumerate(values):
+                bucket[index] += value
+        # Sorted, so concurrent folds upsert the rollup rows in the same order
+        return [
+            {key: bucket, **dict(zip(MEASURES, values))}
+            for bucket, values in sorted(totals.items())
+            if any(values)
+        ]
+
+    def daily_rows(self):
+        return self._rows("day", _day)
+
+    def hourly_rows(self):
+        return self._rows("hour", _hour)
+
+    def record(self, connection=None):
+        """
+        Append the hourly deltas to revenue_deltas (pass the flush connection
+        inside events). Plain INSERTs: no lock on the shared rollup rows.
+        """
+        rows = self.hourly_rows()
+        if rows:
+            (db.session if connection is None else connection).execute(
+                insert(RevenueDelta.__table__), rows
+            )
+
+    def apply(self):
+        """Upsert-increment both rollups; only the fold does this"""
+        increment_many(RevenueDaily.__table__, ("day",), MEASURES, self.daily_rows())
+        increment_many(RevenueHourly.__table__, ("hour",), MEASURES, self.hourly_rows())
+
+
+# Attributes the rollups depend on, per model
+_TRACKED = {
+    Order: ("order_date", "total_amount", "status"),
+    Payment: ("payment_date", "status", "amount"),
+}
+
+
+def _keep_previous(target, value, oldvalue, initiator):
+    return value
+
+
+def _changed(instance, *attributes):
+    state = inspect(instance)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+def _previous(instance, attribute):
+    history = inspect(instance).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(instance, attribute)
+
+
+class RevenueRollups:
+    """
+    Feeds revenue_deltas from ORM flushes.
+
+    Each flush turns new, changed and deleted orders and refunded payments
+    into signed per-hour deltas and appends them on the flush's own
+    connection, so they commit or roll back with the rows. Order writes
+    never touch the hot rollup rows: RevenueFolder folds the deltas in out
+    of band. Core UPDATEs bypass the hook and report through
+    order_total_changed, order_statuses_changed and payment_statuses_changed.
+    """
+
+    def __init__(self):
+        self._listening = False
+
+    def init_app(self, app):
+        self.listen()
+
+    def _collect(self, session, flush_context):
+        deltas = RevenueDeltas()
+        for instance in session.new:
+            if isinstance(instance, Order):
+                deltas.add(
+                    _order_contribution(instance.order_date, instance.total_amount, instance.status)
+                )
+            elif isinstance(instance, Payment):
+                deltas.add(_payment_contribution(instance.payment_date, instance.status, instance.amount))
+        for instance in session.dirty:
+            # Status moves other than to or from CANCELLED net out to nothing
+            if isinstance(instance, Order) and _changed(instance, *_TRACKED[Order]):
+                deltas.replace(
+                    _order_contribution(
+                        _previous(instance, "order_date"),
+                        _previous(instance, "total_amount"),
+                        _previous(instance, "status"),
+                    ),
+                    _order_contribution(instance.order_date, instance.total_amount, instance.status),
+                )
+            elif isinstance(instance, Payment) and _changed(instance, *_TRACKED[Payment]):
+                deltas.replace(
+                    _payment_contribution(
+                        _previous(instance, "payment_date"),
+                        _previous(instance, "status"),
+                        _previous(instance, "amount"),
+                    ),
+                    _payment_contribution(instance.payment_date, instance.status, instance.amount),
+                )
+        for instance in session.deleted:
+            if isinstance(instance, Order):
+                deltas.add(
+                    _order_contribution(instance.order_date, instance.total_amount, instance.status), -1
+                )
+            elif isinstance(instance, Payment):
+                deltas.add(
+                    _payment_contribution(instance.payment_date, instance.status, instance.amount), -1
+                )
+        # Same connection as the flush: the deltas commit with the rows
+        if deltas:
+            deltas.record(session.connection())
+
+    def listen(self):
+        """Hook ORM session events; call once at startup"""
+        if self._listening:
+            return
+        # Load the old value when one of these is set on an expired instance,
+        # otherwise the flush cannot tell what to take off the old bucket
+        for model, attributes in _TRACKED.items():
+            for name in attributes:
+                event.listen(getattr(model, name), "set", _keep_previous, active_history=True, retval=True)
+        event.listen(Session, "after_flush", self._collect)
+        self._listening = True
+
+
+revenue_rollups = RevenueRollups()
+
+
+def order_total_changed(order_date, status, old_total, new_total):
+    """For Core UPDATEs of orders.total_amount, which the flush hook cannot see"""
+    deltas = RevenueDeltas()
+    deltas.replace(
+        _order_contribution(order_date, old_total, status),
+        _order_contribution(order_date, new_total, status),
+    )
+    deltas.record()
+
+
+def order_statuses_changed(changes):
+    """
+    For Core UPDATEs of orders.status: `changes` are
+    (order_date, total_amount, old_status, new_status) tuples.
+    """
+    deltas = RevenueDeltas()
+    for order_date, total_amount, old_status, new_status in changes:
+        deltas.replace(
+            _order_contribution(order_date, total_amount, old_status),
+            _order_contribution(order_date, total_amount, new_status),
+        )
+    deltas.record()
+
+
+def payment_statuses_changed(changes):
+    """
+    For Core UPDATEs of payments.status: `changes` are
+    (payment_date, amount, old_status, new_status) tuples.
+    """
+    deltas = RevenueDeltas()
+    for payment_date, amount, old_status, new_status in changes:
+        deltas.replace(
+            _payment_contribution(payment_date, old_status, amount),
+            _payment_contribution(payment_date, new_status, amount),
+        )
+    deltas.record()
+
+
+def fold_revenue_deltas(batch_size=5000):
+    """
+    Move revenue_deltas into revenue_daily / revenue_hourly, `batch_size`
+    rows per transaction; returns the number of deltas folded.
+
+    Each batch is summed per bucket, upserted into the rollups and deleted
+    in one commit. SKIP LOCKED lets several folders run without taking the
+    same deltas twice.
+    """
+    folded = 0
+    while True:
+        try:
+            rows = db.session.execute(
+                select(RevenueDelta.__table__)
+                .order_by(RevenueDelta.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not rows:
+                db.session.commit()
+                return folded
+            deltas = RevenueDeltas()
+            for row in rows:
+                deltas.add((row.hour, tuple(getattr(row, name) for name in MEASURES)))
+            deltas.apply()
+            db.session.execute(
+                delete(RevenueDelta.__table__).where(RevenueDelta.id.in_([row.id for row in rows]))
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        folded += len(rows)
+        if len(rows) < batch_size:
+            return folded
+
+
+class RevenueFolder:
+    """Background thread that folds revenue_deltas every `interval` seconds"""
+
+    def __init__(self):
+        self.interval = 0
+        self.batch_size = 5000
+        self.folded = 0
+        self.last_run = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        self.interval = app.config["REVENUE_FOLD_INTERVAL"]
+        self.batch_size = app.config["REVENUE_FOLD_BATCH_SIZE"]
+
+    def start(self, app):
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._thread = threading.Thread(
+            target=self._run, args=(app,), name="revenue-folder", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            "interval_seconds": self.interval,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "folded": self.folded,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+        }
+
+    def _run(self, app):
+        while not self._stop.wait(self.interval):
+            with app.app_context():
+                try:
+                    self.folded += fold_revenue_deltas(self.batch_size)
+                    self.last_run = datetime.utcnow()
+                except Exception:
+                    app.logger.exception("Revenue fold failed")
+                finally:
+                    db.session.remove()
+
+
+revenue_folder = RevenueFolder()
+
+
+def rebuild_revenue_rollups():
+    """
+    Recompute both rollups from orders and payments.
+
+    Rows are streamed with yield_per and folded into per-hour totals in
+    Python, which stays portable across SQLite and MySQL date functions;
+    memory is bounded by the number of hours, not of orders. Pending
+    revenue_deltas are dropped: the rebuild already includes them.
+    """
+    deltas = RevenueDeltas()
+    orders = db.session.query(Order.order_date, Order.total_amount, Order.status).filter(
+        Order.status != OrderStatus.CANCELLED
+    )
+    for order_date, total_amount, status in orders.yield_per(5000):
+        deltas.add(_order_contribution(order_date, total_amount, status))
+    refunds = db.session.query(Payment.payment_date, Payment.status, Payment.amount).filter(
+        Payment.status == PaymentStatus.REFUNDED
+    )
+    for payment_date, status, amount in refunds.yield_per(5000):
+        deltas.add(_payment_contribution(payment_date, status, amount))
+
+    db.session.execute(delete(RevenueDelta.__table__))
+    db.session.execute(delete(RevenueDaily.__table__))
+    db.session.execute(delete(RevenueHourly.__table__))
+    daily = deltas.daily_rows()
+    hourly = deltas.hourly_rows()
+    if daily:
+        db.session.execute(insert(RevenueDaily.__table__), daily)
+    if hourly:
+        db.session.execute(insert(RevenueHourly.__table__), hourly)
+    db.session.commit()
+    return len(daily), len(hourly)
+
+
+def revenue_series(date_from, date_to, granularity="day"):
+    """
+    Buckets overlapping [date_from, date_to) with order count, gross,
+    refunds, net revenue and AOV, read from the rollup for `granularity`
+    plus the revenue_deltas not folded in yet.
+    """
+    model = GRANULARITIES[granularity]
+    last = date_to - timedelta(microseconds=1)
+    if granularity == "day":
+        bucket, lower, upper = model.day, date_from.date(), last.date()
+        hours_from = datetime.combine(lower, datetime.min.time())
+        hours_to = datetime.combine(upper + timedelta(days=1), datetime.min.time())
+        bucket_of = _day
+    else:
+        bucket, lower, upper = model.hour, _hour(date_from), _hour(last)
+        hours_from, hours_to = lower, upper + timedelta(hours=1)
+        bucket_of = _hour
+
+    buckets = {}
+    for row in db.session.query(model).filter(bucket >= lower, bucket <= upper):
+        buckets[getattr(row, granularity)] = [getattr(row, name) for name in MEASURES]
+    pending = (
+        db.session.query(RevenueDelta.hour, *(func.sum(getattr(RevenueDelta, name)) for name in MEASURES))
+        .filter(RevenueDelta.hour >= hours_from, RevenueDelta.hour < hours_to)
+        .group_by(RevenueDelta.hour)
+    )
+    for hour, *values in pending:
+        values = [values[0] or 0, _money(values[1]), values[2] or 0, _money(values[3])]
+        merged = buckets.setdefault(bucket_of(_timestamp(hour)), [0, _ZERO, 0, _ZERO])
+        for index, value in enumerate(values):
+            merged[index] += value
+
+    series = []
+    totals = {"order_count": 0, "gross_revenue": _ZERO, "refund_count": 0, "refunded_amount": _ZERO}
+    for key, measures in sorted(buckets.items()):
+        values = dict(zip(MEASURES, measures))
+        for name in MEASURES:
+            totals[name] += values[name]
+        series.append({"bucket": key.isoformat(), **_with_ratios(values)})
+    return series, _with_ratios(totals)
+
+
+def _with_ratios(values):
+    # Money always leaves with two decimals, however the buckets were summed
+    gross = _money(values["gross_revenue"]).quantize(_CENT)
+    refunded = _money(values["refunded_amount"]).quantize(_CENT)
+    orders = values["order_count"]
+    return {
+        **values,
+        "gross_revenue": gross,
+        "refunded_amount": refunded,
+        "net_revenue": gross - refunded,
+        "aov": (gross / orders).quantize(_CENT) if orders else None,
+    }
@@ -0,0 +1,80 @@
+from sqlalchemy import and_, insert, update
+from sqlalchemy.dialects import mysql, sqlite
+
+from app.extensions import db
+
+
+def increment(table, keys, deltas, defaults=None):
+    """
+    Add `deltas` to the rollup row identified by `keys`, creating it if needed.
+    `defaults` are extra columns written only when the row is created.
+
+    Uses a single INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE where the
+    backend supports it so concurrent writers never lose an increment.
+    """
+    dialect = db.engine.dialect.name
+    values = {**(defaults or {}), **keys, **deltas}
+
+    if dialect == "sqlite":
+        stmt = sqlite.insert(table).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + stmt.excluded[name] for name in deltas},
+        )
+        db.session.execute(stmt)
+        return
+    if dialect in ("mysql", "mariadb"):
+        stmt = mysql.insert(table).values(values)
+        stmt = stmt.on_duplicate_key_update(
+            {name: table.c[name] + stmt.inserted[name] for name in deltas}
+        )
+        db.session.execute(stmt)
+        return
+
+    match = and_(*(table.c[name] == value for name, value in keys.items()))
+    result = db.session.execute(
+        update(table)
+        .where(match)
+        .values({name: table.c[name] + value for name, value in deltas.items()})
+    )
+    if result.rowcount == 0:
+        db.session.execute(insert(table).values(values))
+
+
+def increment_many(table, keys, deltas, rows, connection=None):
+    """
+    Upsert-increment many rows with one executemany.
+
+    `rows` are dicts holding every column to insert; on a conflict on the
+    `keys` columns the `deltas` columns are added to the existing row and
+    everything else is left untouched. Pass `connection` to run on it
+    directly, e.g. from inside a session flush event.
+    """
+    if not rows:
+        return
+    executor = db.session if connection is None else connection
+    dialect = (db.engine.dialect if connection is None else connection.dialect).name
+
+    if dialect == "sqlite":
+        stmt = sqlite.insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + stmt.excluded[name] for name in deltas},
+        )
+        executor.execute(stmt, rows)
+        return
+    if dialect in ("mysql", "mariadb"):
+        stmt = mysql.insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            {name: table.c[name] + stmt.inserted[name] for name in deltas}
+        )
+        executor.execute(stmt, rows)
+        return
+
+    for row in rows:
+        match = and_(*(table.c[name] == row[name] for name in keys))
+        result = executor.execute(
+            update(table).where(match).values({name: table.c[name] + row[name] for name in deltas})
+        )
+        if result.rowcount == 0:
+            executor.execute(insert(table).values(row))
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import delete, func, insert, select
+
+from app.extensions import db
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.product_sales import ProductSalesDaily
+from app.utils.rollups import increment, increment_many
+
+METRICS = ("units", "revenue")
+
+
+def record_sale(product_id, category_id, sold_at, quantity, price_per_unit):
+    """
+    Add one order line to product_sales_daily.
+
+    Call inside the transaction that writes the order item so the rollup
+    commits (or rolls back) together with it.
+    """
+    day = (sold_at or datetime.utcnow()).date()
+    increment(
+        ProductSalesDaily.__table__,
+        keys={"product_id": product_id, "day": day},
+        deltas={
+            "units": int(quantity),
+            "revenue": Decimal(str(price_per_unit)) * int(quantity),
+        },
+        defaults={"category_id": category_id},
+    )
+
+
+def record_sales(lines, sold_at):
+    """
+    Add many order lines to product_sales_daily with one executemany.
+
+    `lines` are (product_id, category_id, quantity, price_per_unit) tuples;
+    repeated products are summed first. Call inside the transaction that
+    writes the order items.
+    """
+    day = (sold_at or datetime.utcnow()).date()
+    totals = {}
+    for product_id, category_id, quantity, price_per_unit in lines:
+        row = totals.setdefault(
+            product_id,
+            {"product_id": product_id, "day": day, "category_id": category_id, "units": 0, "revenue": Decimal("0")},
+        )
+        row["units"] += int(quantity)
+        row["revenue"] += Decimal(str(price_per_unit)) * int(quantity)
+    increment_many(
+        ProductSalesDaily.__table__,
+        keys=("product_id", "day"),
+        deltas=("units", "revenue"),
+        rows=list(totals.values()),
+    )
+
+
+def rebuild_sales_rollup():
+    """Recompute product_sales_daily from order_items in one set-based pass"""
+    day = func.date(Order.order_date)
+    source = (
+        select(
+            OrderItem.product_id,
+            day,
+            func.min(Product.category_id),
+            func.sum(OrderItem.quantity),
+            func.sum(OrderItem.quantity * OrderItem.price_per_unit),
+        )
+        .join(Order, Order.id == OrderItem.order_id)
+        .join(Product, Product.id == OrderItem.product_id)
+        .group_by(OrderItem.product_id, day)
+    )
+    table = ProductSalesDaily.__table__
+
+    db.session.execute(delete(table))
+    result = db.session.execute(
+        insert(table).from_select(
+            ["product_id", "day", "category_id", "units", "revenue"], source
+        )
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def top_products(metric="units", days=None, category_id=None, limit=10):
+    """Best sellers ranked by units or revenue, read from the rollup only"""
+    units = func.sum(ProductSalesDaily.units).label("units")
+    revenue = func.sum(ProductSalesDaily.revenue).label("revenue")
+    query = db.session.query(ProductSalesDaily.product_id, units, revenue)
+
+    if days is not None:
+        since = datetime.utcnow().date() - timedelta(days=days - 1)
+        query = query.filter(ProductSalesDaily.day >= since)
+    if category_id is not None:
+        query = query.filter(ProductSalesDaily.category_id == category_id)
+
+    ranking = units if metric == "units" else revenue
+    rows = (
+        query.group_by(ProductSalesDaily.product_id)
+        .order_by(ranking.desc(), ProductSalesDaily.product_id)
+        .limit(limit)
+        .all()
+    )
+    return [
+        {"product_id": product_id, "units": int(row_units), "revenue": row_revenue}
+        for product_id, row_units, row_revenue in rows
+    ]
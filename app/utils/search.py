@@ -0,0 +1,110 @@
+import re
+
+from sqlalchemy import or_, text
+
+from app.extensions import db
+from app.models.product import PRODUCT_FTS_DDL, Product
+from app.utils.fieldsets import load_only_fields
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _terms(q):
+    return _TERM_RE.findall(q or "")[:16]
+
+
+def _sqlite_match(terms):
+    # Quote every term so FTS5 operators in user input are treated as text;
+    # the last term is a prefix match to support partially typed words.
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _mysql_match(terms):
+    required = [f"+{term}" for term in terms]
+    required[-1] += "*"
+    return " ".join(required)
+
+
+def _ranked_ids(terms, limit, offset):
+    dialect = db.engine.dialect.name
+
+    if dialect == "sqlite":
+        sql = text(
+            "SELECT rowid FROM products_fts WHERE products_fts MATCH :match "
+            "ORDER BY bm25(products_fts, 10.0, 1.0), rowid LIMIT :limit OFFSET :offset"
+        )
+        params = {"match": _sqlite_match(terms)}
+    elif dialect in ("mysql", "mariadb"):
+        sql = text(
+            "SELECT id FROM products "
+            "WHERE MATCH(name, description) AGAINST (:match IN BOOLEAN MODE) "
+            "ORDER BY MATCH(name, description) AGAINST (:match IN BOOLEAN MODE) DESC, id "
+            "LIMIT :limit OFFSET :offset"
+        )
+        params = {"match": _mysql_match(terms)}
+    else:
+        # No native text index for this backend: fall back to a LIKE scan.
+        query = db.session.query(Product.id)
+        for term in terms:
+            pattern = f"%{term}%"
+            query = query.filter(
+                or_(Product.name.ilike(pattern), Product.description.ilike(pattern))
+            )
+        rows = query.order_by(Product.id).limit(limit).offset(offset).all()
+        return [row[0] for row in rows]
+
+    params.update(limit=limit, offset=offset)
+    return [row[0] for row in db.session.execute(sql, params)]
+
+
+def search_products(q, limit, offset=0, fields=None):
+    """
+    Return (products, has_more) for the relevance-ranked matches of `q`.
+
+    Ranking has to score every match before the first row comes back, so
+    paging is by offset; only `limit` + 1 ids are materialized per call.
+    `fields` restricts the columns loaded for the returned products.
+    """
+    terms = _terms(q)
+    if not terms:
+        return [], False
+
+    ids = _ranked_ids(terms, limit + 1, offset)
+    has_more = len(ids) > limit
+    ids = ids[:limit]
+    if not ids:
+        return [], has_more
+
+    query = Product.query.filter(Product.id.in_(ids))
+    if fields is not None:
+        query = load_only_fields(query, Product, fields)
+    by_id = {product.id: product for product in query}
+    return [by_id[i] for i in ids if i in by_id], has_more
+
+
+def rebuild_search_index():
+    """Create the search index if missing and repopulate it from products"""
+    dialect = db.engine.dialect.name
+
+    if dialect == "sqlite":
+        for statement in PRODUCT_FTS_DDL:
+            db.session.execute(text(statement))
+        db.session.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+    elif dialect in ("mysql", "mariadb"):
+        exists = db.session.execute(
+            text(
+                "SELECT COUNT(*) FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = 'products' "
+                "AND index_name = 'ft_products_name_description'"
+            )
+        ).scalar()
+        if not exists:
+            db.session.execute(
+                text(
+                    "CREATE FULLTEXT INDEX ft_products_name_description "
+                    "ON products(name, description)"
+                )
+            )
+    db.session.commit()
@@ -45,7 +45,11 @@ CREATE TABLE categories (
     id INT AUTO_INCREMENT PRIMARY KEY,
     name VARCHAR(100) NOT NULL UNIQUE,
     description TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    parent_id INT,
+    path VARCHAR(255), -- Materialized path of ancestor ids, e.g. '/1/4/9/'
+    FOREIGN KEY (parent_id) REFERENCES categories(id) ON DELETE RESTRICT
 );
 
 -- Table: products
@@ -58,6 +62,7 @@ CREATE TABLE products (
     price DECIMAL(10, 2) NOT NULL,
     sku VARCHAR(100) NOT NULL UNIQUE,  -- Stock Keeping Unit
     stock_quantity INT NOT NULL DEFAULT 0,
+    reserved_quantity INT NOT NULL DEFAULT 0,  -- held by active inventory reservations
     image_url VARCHAR(255),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
@@ -104,10 +109,155 @@ CREATE TABLE payments (
     FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE
 );
 
+-- Table: product_sales_daily
+-- Units and revenue per product per day, maintained as order items are created.
+CREATE TABLE product_sales_daily (
+    product_id INT NOT NULL,
+    day DATE NOT NULL,
+    category_id INT NOT NULL,
+    units INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (product_id, day),
+    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
+);
+
+-- Table: revenue_daily / revenue_hourly
+-- Order count, gross revenue and refunds per day and per hour (UTC), folded in
+-- from revenue_deltas. Cancelled orders are not counted.
+-- AOV = gross_revenue / order_count.
+CREATE TABLE revenue_daily (
+    day DATE PRIMARY KEY,
+    order_count INT NOT NULL DEFAULT 0,
+    gross_revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    refund_count INT NOT NULL DEFAULT 0,
+    refunded_amount DECIMAL(14, 2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE revenue_hourly (
+    hour DATETIME PRIMARY KEY,
+    order_count INT NOT NULL DEFAULT 0,
+    gross_revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    refund_count INT NOT NULL DEFAULT 0,
+    refunded_amount DECIMAL(14, 2) NOT NULL DEFAULT 0
+);
+
+-- Table: revenue_deltas
+-- Append-only per-hour changes written with each order and payment write;
+-- folded into revenue_daily / revenue_hourly in the background and deleted.
+CREATE TABLE revenue_deltas (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    hour DATETIME NOT NULL,
+    order_count INT NOT NULL DEFAULT 0,
+    gross_revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    refund_count INT NOT NULL DEFAULT 0,
+    refunded_amount DECIMAL(14, 2) NOT NULL DEFAULT 0
+);
+
+-- Table: inventory_reservations
+-- Temporary stock holds between cart and payment; expired holds are swept.
+CREATE TABLE inventory_reservations (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    product_id INT NOT NULL,
+    order_id INT,
+    quantity INT NOT NULL,
+    status ENUM("ACTIVE", "CONFIRMED", "RELEASED", "EXPIRED") NOT NULL DEFAULT 'ACTIVE',
+    expires_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
+    FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE SET NULL
+);
+
+-- Table: idempotency_keys
+-- Responses of write requests sent with an Idempotency-Key header, kept for replay.
+CREATE TABLE idempotency_keys (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    scope VARCHAR(100) NOT NULL,
+    `key` VARCHAR(255) NOT NULL,
+    fingerprint CHAR(64) NOT NULL,
+    status_code SMALLINT,
+    response_body TEXT,
+    locked_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    committed_at TIMESTAMP NULL, -- set with the view's first commit
+    expires_at TIMESTAMP NOT NULL,
+    UNIQUE KEY `uk_idempotency_scope_key` (scope, `key`)
+);
+
+-- Table: outbox_events
+-- Side effects of order/payment writes, inserted in the same transaction and
+-- delivered at least once by the outbox worker.
+CREATE TABLE outbox_events (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    event_type VARCHAR(100) NOT NULL,
+    aggregate_type VARCHAR(50) NOT NULL,
+    aggregate_id INT NOT NULL,
+    payload TEXT NOT NULL,
+    status ENUM("PENDING", "DELIVERED", "FAILED") NOT NULL DEFAULT 'PENDING',
+    attempts INT NOT NULL DEFAULT 0,
+    available_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    delivered_at TIMESTAMP NULL
+);
+
+-- Table: payment_reconciliations
+-- Progress and totals of a settlement-file reconciliation run (resumable).
+CREATE TABLE payment_reconciliations (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    status ENUM("RUNNING", "COMPLETED", "FAILED") NOT NULL DEFAULT 'RUNNING',
+    apply_fixes BOOLEAN NOT NULL DEFAULT FALSE,
+    lines_processed INT NOT NULL DEFAULT 0,
+    matched INT NOT NULL DEFAULT 0,
+    missing INT NOT NULL DEFAULT 0,
+    amount_mismatches INT NOT NULL DEFAULT 0,
+    status_mismatches INT NOT NULL DEFAULT 0,
+    corrected INT NOT NULL DEFAULT 0,
+    invalid INT NOT NULL DEFAULT 0,
+    error TEXT,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP NULL
+);
+
+-- Table: payment_reconciliation_mismatches
+-- Mismatch report of a reconciliation run, one row per settlement line.
+CREATE TABLE payment_reconciliation_mismatches (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    reconciliation_id INT NOT NULL,
+    line INT NOT NULL,
+    transaction_id VARCHAR(255),
+    kind VARCHAR(20) NOT NULL,  -- missing, amount, status or invalid
+    payment_id INT,
+    expected VARCHAR(255),
+    actual VARCHAR(255),
+    corrected BOOLEAN NOT NULL DEFAULT FALSE,
+    FOREIGN KEY (reconciliation_id) REFERENCES payment_reconciliations(id) ON DELETE CASCADE
+);
+
 -- -------------------------------------------------------------
 -- Section 2: Indexes for Performance
 -- -------------------------------------------------------------
 
 CREATE INDEX idx_email ON users(email);
 CREATE INDEX idx_name ON products(name);
-CREATE INDEX idx_sku ON products(sku);
\ No newline at end of file
+CREATE INDEX idx_sku ON products(sku);
+CREATE INDEX idx_products_created_at_id ON products(created_at, id);
+CREATE INDEX idx_products_price_id ON products(price, id);
+CREATE FULLTEXT INDEX ft_products_name_description ON products(name, description);
+CREATE INDEX idx_products_category_price ON products(category_id, price);
+CREATE INDEX idx_products_stock_quantity ON products(stock_quantity);
+CREATE INDEX idx_products_updated_at ON products(updated_at);
+CREATE INDEX idx_product_sales_day ON product_sales_daily(day, product_id);
+CREATE INDEX idx_product_sales_category_day ON product_sales_daily(category_id, day);
+CREATE INDEX idx_products_category_created_at ON products(category_id, created_at, id);
+CREATE INDEX idx_categories_path ON categories(path);
+CREATE INDEX idx_categories_updated_at ON categories(updated_at);
+CREATE INDEX idx_orders_user_order_date ON orders(user_id, order_date, id);
+CREATE INDEX idx_reservations_product_status_expires ON inventory_reservations(product_id, status, expires_at);
+CREATE INDEX idx_reservations_status_expires ON inventory_reservations(status, expires_at);
+CREATE INDEX idx_idempotency_expires_at ON idempotency_keys(expires_at);
+CREATE INDEX idx_outbox_status_available ON outbox_events(status, available_at, id);
+CREATE INDEX idx_payments_transaction_id ON payments(transaction_id);
+CREATE INDEX idx_reconciliation_mismatches_run ON payment_reconciliation_mismatches(reconciliation_id, id);
+CREATE INDEX idx_revenue_deltas_hour ON revenue_deltas(hour);
@@ -10,8 +10,6 @@ import sys
 from datetime import datetime
 from decimal import Decimal
 
-import bcrypt
-
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath('.'))
 
@@ -19,16 +17,25 @@ from app import create_app
 from app.extensions import db
 from app.models.address import Address
 from app.models.category import Category
+from app.models.idempotency_key import IdempotencyKey
+from app.models.inventory_reservation import InventoryReservation
 from app.models.order import Order, OrderStatus
 from app.models.order_item import OrderItem
+from app.models.outbox_event import OutboxEvent
 from app.models.payment import Payment, PaymentStatus
+from app.models.payment_reconciliation import PaymentReconciliation, ReconciliationMismatch
 from app.models.product import Product
+from app.models.product_sales import ProductSalesDaily
+from app.models.revenue import RevenueDaily, RevenueHourly
 from app.models.user import User, UserRole
+from app.utils.passwords import password_hasher
+from app.utils.revenue import rebuild_revenue_rollups
+from app.utils.sales import rebuild_sales_rollup
 
 
 def hash_password(password: str) -> str:
-    """Generate bcrypt hash for a password"""
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    """Generate bcrypt hash for a password (same pool and cost as the API)"""
+    return password_hasher.hash(password)
 
 
 def clear_database():
@@ -37,6 +44,14 @@ def clear_database():
     
     try:
         # Order matters due to foreign key constraints
+        db.session.query(IdempotencyKey).delete()
+        db.session.query(OutboxEvent).delete()
+        db.session.query(ReconciliationMismatch).delete()
+        db.session.query(PaymentReconciliation).delete()
+        db.session.query(InventoryReservation).delete()
+        db.session.query(ProductSalesDaily).delete()
+        db.session.query(RevenueDaily).delete()
+        db.session.query(RevenueHourly).delete()
         db.session.query(Payment).delete()
         db.session.query(OrderItem).delete()
         db.session.query(Order).delete()
@@ -137,6 +152,9 @@ def seed_categories():
     for category in categories:
         db.session.add(category)
     
+    db.session.flush()
+    for category in categories:
+        category.assign_path()
     db.session.commit()
     print(f"Created {len(categories)} categories")
     return categories
@@ -449,6 +467,11 @@ def main():
         orders = seed_orders(users, addresses, products)
         order_items = seed_order_items(orders, products)
         payments = seed_payments(orders)
+
+        # Backfill the best-seller rollup from the seeded order items
+        rebuild_sales_rollup()
+        # Rebuild the revenue rollups so they match the seeded rows exactly
+        rebuild_revenue_rollups()
         
         print("=" * 50)
         print("🎉 Database seeding completed successfully!")